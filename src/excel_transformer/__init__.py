@@ -1,8 +1,15 @@
 __all__ = [
     "load_config",
     "transform_rows",
+    "iter_transform_rows",
+    "compute_fieldnames",
+    "install_openpyxl_warning_filter",
 ]
 
 from .config import load_config
-from .transform import transform_rows
-
+from .transform import (
+    compute_fieldnames,
+    install_openpyxl_warning_filter,
+    iter_transform_rows,
+    transform_rows,
+)
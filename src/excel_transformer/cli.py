@@ -1,39 +1,22 @@
 import argparse
+import re
 from pathlib import Path
 from typing import List, Optional
 
 from .config import load_config
-import json
-import ast
 from .transform import (
+    compute_fieldnames,
+    iter_transform_rows,
+    iter_transform_rows_grouped,
     print_terminal,
-    transform_rows,
-    transform_rows_grouped,
     write_csv,
     write_xlsx,
 )
 
 
-def _split_top_level_commas(s: str) -> List[str]:
-    parts: List[str] = []
-    buf: List[str] = []
-    depth = 0
-    for ch in s:
-        if ch == ',' and depth == 0:
-            part = ''.join(buf).strip()
-            if part:
-                parts.append(part)
-            buf = []
-            continue
-        if ch == '[':
-            depth += 1
-        elif ch == ']':
-            depth = max(0, depth - 1)
-        buf.append(ch)
-    last = ''.join(buf).strip()
-    if last:
-        parts.append(last)
-    return parts
+# One --row/--rows item per match: "[a,b]" range or "[a,b,c]" list, "a-b"
+# range, or a single number; items are comma separated and may be empty.
+_ROW_ITEM_RE = re.compile(r"\s*(?:\[([\d\s,]*)\]|(\d+)\s*-\s*(\d+)|(\d+))?\s*(?:,|$)")
 
 
 def _parse_rows_arg(rows: Optional[str]) -> Optional[List[int]]:
@@ -41,32 +24,25 @@ def _parse_rows_arg(rows: Optional[str]) -> Optional[List[int]]:
         return None
     result: List[int] = []
     s = rows.strip()
-    # Split by top-level commas, so bracketed sections remain intact
-    parts = _split_top_level_commas(s)
-    for part in parts:
-        part = part.strip()
-        if not part:
-            continue
-        # Bracket sub-expression: [a,b] range or explicit list
-        if part.startswith("[") and part.endswith("]"):
-            try:
-                arr = json.loads(part)
-            except Exception:
-                arr = ast.literal_eval(part)
-            if isinstance(arr, list):
-                if len(arr) == 2 and all(isinstance(x, int) for x in arr):
-                    a, b = arr
-                    lo, hi = (a, b) if a <= b else (b, a)
-                    result.extend(list(range(lo, hi + 1)))
-                    continue
-                result.extend(int(x) for x in arr)
-                continue
-        if "-" in part:
-            a, b = part.split("-", 1)
-            start, end = int(a), int(b)
-            result.extend(list(range(start, end + 1)))
-        else:
-            result.append(int(part))
+    pos = 0
+    while pos < len(s):
+        m = _ROW_ITEM_RE.match(s, pos)
+        if m is None:
+            raise ValueError(f"无法解析行号表达式：{rows!r}")
+        pos = m.end()
+        bracket, start, end, single = m.groups()
+        if single is not None:
+            result.append(int(single))
+        elif start is not None:
+            result.extend(range(int(start), int(end) + 1))
+        elif bracket is not None:
+            # Bracket sub-expression: [a,b] range (either order) or explicit list
+            arr = [int(x) for x in bracket.split(",") if x.strip()]
+            if len(arr) == 2:
+                lo, hi = sorted(arr)
+                result.extend(range(lo, hi + 1))
+            else:
+                result.extend(arr)
     return result
 
 
@@ -147,7 +123,7 @@ def main(argv: Optional[List[str]] = None) -> int:
     # For file outputs (csv/xlsx), always use grouped shape to ensure
     # one cell per [out] object and columns defined by __label__.
     if args.format in {"csv", "xlsx"}:
-        rows = transform_rows_grouped(
+        rows = iter_transform_rows_grouped(
             excel_path=args.excel,
             display_to_internal=cfg.display_to_internal,
             out_groups=cfg.out_groups,
@@ -156,7 +132,7 @@ def main(argv: Optional[List[str]] = None) -> int:
             row_numbers=row_numbers,
         )
     else:
-        rows = transform_rows(
+        rows = iter_transform_rows(
             excel_path=args.excel,
             display_to_internal=cfg.display_to_internal,
             out_groups=cfg.out_groups,
@@ -189,10 +165,13 @@ def main(argv: Optional[List[str]] = None) -> int:
         elif args.compact_json:
             compact = True
 
+        # Columns are the group labels, known from config, so rows are
+        # written as they are transformed.
+        fieldnames = compute_fieldnames(cfg.out_groups, grouped=True)
         if args.format == "csv":
-            write_csv(out_path, rows, compact_json=compact)
+            write_csv(out_path, rows, compact_json=compact, fieldnames=fieldnames)
         else:
-            write_xlsx(out_path, rows, compact_json=compact)
+            write_xlsx(out_path, rows, compact_json=compact, fieldnames=fieldnames)
 
     return 0
 
@@ -1,25 +1,30 @@
 import json
 import ast
+import copy
+import hashlib
 import re
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple
 
 
-COMMENT_RE = re.compile(r"//.*$")
-TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+# One alternation scanned left to right: double-quoted strings are matched
+# first and kept (group 1), so "//" or ",}" inside them survive; trailing commas
+# (with any whitespace/comments/extra commas up to } or ]) and line comments are
+# dropped. Unmatched group 1 substitutes as "".
+JSON_NOISE_RE = re.compile(
+    r'("(?:\\.|[^"\\\n])*")'
+    r"|,(?:\s|//[^\n]*|,)*(?=[}\]])"
+    r"|//[^\n]*"
+)
+
+
+_JSON_DECODER = json.JSONDecoder()
 
 
 def _strip_json_comments(s: str) -> str:
     """Remove // comments and trailing commas for JSON-like snippets."""
-    # Remove line comments
-    s = "\n".join(COMMENT_RE.sub("", line) for line in s.splitlines())
-    # Remove trailing commas before } or ]
-    while True:
-        new_s = TRAILING_COMMA_RE.sub(r"\1", s)
-        if new_s == s:
-            break
-        s = new_s
-    return s
+    return JSON_NOISE_RE.sub(r"\1", s)
 
 
 def _parse_multiple_json_objects(blob: str) -> List[Dict[str, Any]]:
@@ -36,94 +41,64 @@ def _parse_multiple_json_objects(blob: str) -> List[Dict[str, Any]]:
     items: List[Dict[str, Any]] = []
     text = _strip_json_comments(blob)
     i = 0
-    n = len(text)
-    while i < n:
-        # Skip whitespace
-        while i < n and text[i].isspace():
-            i += 1
-        if i >= n:
+    while True:
+        # Anything between objects (e.g. a "Label:" line) is skipped here and
+        # picked up again by the label lookup below.
+        start = text.find("{", i)
+        if start < 0:
             break
-        # Find the next object start '{'
-        if text[i] != "{":
-            # Allow an optional single-line label ending with ':' before the object
-            # Capture the line up to ':' and then expect '{' after optional whitespace/newline.
-            # Move to the next non-space
-            label_start = i
-            # Read to line end
-            while i < n and text[i] != '\n' and text[i] != '{':
-                i += 1
-            # If we stopped at '{' on same line, backtrack to find ':'
-            line = text[label_start:i]
-            label_val: str | None = None
-            if ':' in line:
-                # Take content before ':'
-                label_candidate = line.split(':', 1)[0].strip()
-                if label_candidate:
-                    label_val = label_candidate
-            # Now skip to next '{'
-            while i < n and text[i] != '{':
-                i += 1
-            if i >= n:
-                break
-            # From here, i points to '{' and label_val holds an optional label
-        # Parse JSON object from i (which is '{')
-        depth = 0
-        start = i
-        i += 1
-        while i < n:
-            ch = text[i]
-            if ch == '{':
-                depth += 1
-            elif ch == '}':
-                if depth == 0:
-                    i += 1
-                    break
-                depth -= 1
-            elif ch in ('"', "'"):
-                # Skip string contents safely for both double/single quoted strings
-                quote = ch
-                i += 1
-                while i < n:
-                    if text[i] == '\\':
-                        i += 2
-                        continue
-                    if text[i] == quote:
-                        i += 1
-                        break
-                    i += 1
-                continue
-            i += 1
-        obj_raw = text[start:i]
-        # Prefer JSON parsing; fallback to Python literal_eval to support single quotes
         try:
-            obj = json.loads(obj_raw)
-        except Exception:
-            obj = ast.literal_eval(obj_raw)  # type: ignore[assignment]
+            obj, i = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            # Not strict JSON (e.g. single quotes): fall back to Python literals
+            i = _find_object_end(text, start)
+            obj = ast.literal_eval(text[start:i])
         # Alias common typo: __lable__ -> __label__
         if isinstance(obj, dict) and "__lable__" in obj and "__label__" not in obj:
             obj["__label__"] = obj.get("__lable__")
         # Attempt to find a label on the immediate previous non-empty line
-        # If not already injected by earlier step
-        # Look backwards from start to previous line
         if '__label__' not in obj:
-            j = start - 1
-            # Skip whitespace backwards
-            while j >= 0 and text[j].isspace():
-                # stop at newline but keep going to find previous line start
+            j = start
+            while j > 0 and text[j - 1].isspace():
                 j -= 1
-            # Find line start
-            line_end = j
-            while j >= 0 and text[j] != '\n':
-                j -= 1
-            line_start = j + 1
-            prev_line = text[line_start:line_end + 1]
-            pl = prev_line.strip()
+            pl = text[text.rfind("\n", 0, j) + 1:j].strip()
             if pl.endswith(':') and pl[:-1].strip():
                 obj['__label__'] = pl[:-1].strip()
         items.append(obj)
     return items
 
 
+def _find_object_end(text: str, start: int) -> int:
+    """Return the index just past the '{...}' object starting at ``start``.
+
+    Only used for the ast.literal_eval fallback, so both quote styles are
+    skipped as strings.
+    """
+    depth = 0
+    n = len(text)
+    i = start + 1
+    while i < n:
+        ch = text[i]
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            if depth == 0:
+                return i + 1
+            depth -= 1
+        elif ch in ('"', "'"):
+            quote = ch
+            i += 1
+            while i < n:
+                if text[i] == '\\':
+                    i += 2
+                    continue
+                if text[i] == quote:
+                    break
+                i += 1
+        i += 1
+    return n
+
+
 @dataclass
 class Config:
     # Map from display column name (e.g., 中文列名) to internal key (e.g., "record")
@@ -137,10 +112,41 @@ def load_config(path: str) -> Config:
 
     [map] contains one JSON object. [out] contains one or more JSON objects.
     JSON may include // comments and trailing commas.
+
+    Parsed configs are cached by a digest of the file bytes, so loading the
+    same text again (from any path, or after a touch) skips re-parsing it.
+    Each call returns its own Config (deep copies of the cached mappings), so
+    changing a loaded config never affects later loads.
     """
-    with open(path, "r", encoding="utf-8") as f:
-        content = f.read()
+    with open(path, "rb") as f:
+        data = f.read()
+    key = hashlib.blake2b(data, digest_size=16).digest()
+    cached = _config_cache.get(key)
+    if cached is not None:
+        _config_cache.move_to_end(key)
+        return _copy_config(cached)
+
+    cfg = _parse_config_text(data.decode("utf-8"))
+    _config_cache[key] = cfg
+    if len(_config_cache) > _CONFIG_CACHE_SIZE:
+        _config_cache.popitem(last=False)
+    return _copy_config(cfg)
+
+
+def _copy_config(cfg: Config) -> Config:
+    return Config(
+        display_to_internal=dict(cfg.display_to_internal),
+        out_groups=copy.deepcopy(cfg.out_groups),
+    )
+
+
+# Parsed configs keyed by a digest of the file bytes (LRU). Not synchronised:
+# load_config is called once per CLI run, not from worker threads.
+_CONFIG_CACHE_SIZE = 64
+_config_cache: "OrderedDict[bytes, Config]" = OrderedDict()
+
 
+def _parse_config_text(content: str) -> Config:
     # Split by sections
     section_re = re.compile(r"^\s*\[(map|out)\]\s*$", re.MULTILINE)
     sections: List[Tuple[str, int, int]] = []
@@ -1,42 +1,107 @@
 from __future__ import annotations
 
+import functools
 import json
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from collections import OrderedDict
 from contextlib import contextmanager
+from itertools import islice
+import operator
+import sys
 import warnings
 
 from openpyxl import load_workbook, Workbook
 
+# A compiled [out] group (generated function): row_values -> record
+FieldResolver = Callable[[Sequence[Any]], Any]
+# A compiled ex condition: left operand value -> matched?
+Condition = Callable[[Any], bool]
+
+# Shared encoders for container cells; json.dumps would build one per call.
+_COMPACT_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+_PRETTY_JSON = json.JSONEncoder(ensure_ascii=False, indent=2).encode
+_TERMINAL_JSON = json.JSONEncoder(ensure_ascii=False).encode
+# Output file buffer for write_csv
+_WRITE_BUFFER_SIZE = 1 << 20
+# Rows encoded per stdout write in print_terminal
+_PRINT_BATCH_ROWS = 1000
+
 
 def _build_internal_to_display(mapper: Mapping[str, str]) -> Dict[str, str]:
     return {v: k for k, v in mapper.items()}
 
 
+# Characters a float()/int() literal can start with, besides Unicode decimal
+# digits: sign, decimal point, and the i/n of inf/nan.
+_NUMERIC_LEADS = frozenset("0123456789+-.iInN")
+
+
 def _coerce_literal(val: Any) -> Any:
     # Try to coerce strings that look like numbers
     if isinstance(val, str):
-        s = val.strip()
-        if s.isdigit():
-            try:
-                return int(s)
-            except Exception:
-                return val
-        try:
-            return float(s)
-        except Exception:
-            return val
+        return _coerce_text(val)
     return val
 
 
-def _eval_condition(expr: str, context: Mapping[str, Any]) -> bool:
-    # Very small evaluator supporting comparisons like a==b, a!=b, a>b, etc.
-    ops = ["==", "!=", ">=", "<=", ">", "<"]
-    for op in ops:
-        if op in expr:
-            left, right = expr.split(op, 1)
+@functools.lru_cache(maxsize=4096)
+def _coerce_text(val: str) -> Any:
+    # Condition operands repeat heavily across rows (status codes, scores),
+    # so parsed results are cached by the raw cell text.
+    s = val.strip()
+    # Most text cells cannot parse; reject them without raising ValueError
+    if not s or (s[0] not in _NUMERIC_LEADS and not s[0].isdecimal()):
+        return val
+    # int() first keeps negative and very large integers exact
+    try:
+        return int(s)
+    except ValueError:
+        pass
+    try:
+        return float(s)
+    except ValueError:
+        return val
+
+
+_COMPARISONS: Tuple[Tuple[str, Callable[[Any, Any], Any]], ...] = (
+    ("==", operator.eq),
+    ("!=", operator.ne),
+    (">=", operator.ge),
+    ("<=", operator.le),
+    (">", operator.gt),
+    ("<", operator.lt),
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_condition(expr: str) -> Optional[Tuple[str, Condition]]:
+    """Compile a comparison like ``score==2`` into (left_key, predicate).
+
+    The expression is split and the right-hand side unquoted or coerced to a
+    number once; the predicate only coerces and compares the left value it is
+    given. Returns None when no supported operator is present (such a
+    condition never matches).
+
+    Results are cached by expression text, so the same condition repeated
+    across rules, groups or transform calls is parsed once and shares one
+    predicate.
+    """
+    for symbol, compare in _COMPARISONS:
+        if symbol in expr:
+            left, right = expr.split(symbol, 1)
             left, right = left.strip(), right.strip()
-            lv = context.get(left)
             rv: Any
             # Strip quotes around right if present
             if (right.startswith("'") and right.endswith("'")) or (
@@ -45,71 +110,222 @@ def _eval_condition(expr: str, context: Mapping[str, Any]) -> bool:
                 rv = right[1:-1]
             else:
                 rv = _coerce_literal(right)
-            lv = _coerce_literal(lv)
-            try:
-                if op == "==":
-                    return lv == rv
-                if op == "!=":
-                    return lv != rv
-                if op == ">=":
-                    return lv >= rv  # type: ignore[operator]
-                if op == "<=":
-                    return lv <= rv  # type: ignore[operator]
-                if op == ">":
-                    return lv > rv  # type: ignore[operator]
-                if op == "<":
-                    return lv < rv  # type: ignore[operator]
-            except Exception:
-                return False
-    # Fallback: unknown expression -> False
-    return False
 
+            def predicate(value: Any) -> bool:
+                try:
+                    return compare(_coerce_literal(value), rv)
+                except Exception:
+                    return False
+
+            return left, predicate
+    return None
+
+
+def _build_column_index(headers: Sequence[str]) -> Dict[str, int]:
+    # First occurrence wins for duplicate header names (like list.index)
+    col_idx: Dict[str, int] = {}
+    for i, name in enumerate(headers):
+        col_idx.setdefault(name, i)
+    return col_idx
+
+
+def _build_internal_to_col(
+    col_idx: Mapping[str, int], internal_to_display: Mapping[str, str]
+) -> Dict[str, int]:
+    """Map internal keys straight to column positions (unmatched keys omitted)."""
+    return {
+        internal: col_idx[display]
+        for internal, display in internal_to_display.items()
+        if display and display in col_idx
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class PlanNode:
+    """Row-independent compiled form of one [out] field.
+
+    ``kind`` is one of:
+    - "const": the literal ``value``
+    - "column": the cell at position ``col`` ("" past the end of a short row)
+    - "nested": a dict built from ``fields`` (output key, child) in order
+    - "rule": the override of the first ``rules`` entry (condition, operand,
+      override) whose condition holds for its operand, else ``default``
+    """
+
+    kind: str
+    value: Any = None
+    col: int = -1
+    fields: Tuple[Tuple[str, "PlanNode"], ...] = ()
+    rules: Tuple[Tuple[Condition, "PlanNode", "PlanNode"], ...] = ()
+    default: Optional["PlanNode"] = None
+
+
+class _Namespace:
+    """Globals for one generated resolver function.
+
+    Config-derived values (output keys, literals, predicates) are bound to
+    generated names and referenced by name, so no config text is ever pasted
+    into the generated source. Only names, column indexes and fixed syntax are.
+    """
+
+    def __init__(self) -> None:
+        self.names: Dict[str, Any] = {}
+        # Conditions evaluated once at the top of the function -> local name
+        self.shared: Dict[Tuple[Any, ...], str] = {}
+
+    def bind(self, value: Any, prefix: str = "_c") -> str:
+        name = f"{prefix}{len(self.names)}"
+        self.names[name] = value
+        return name
 
-def _cell_value_by_display(headers: List[str], row_values: List[Any], display_name: str) -> Any:
-    try:
-        idx = headers.index(display_name)
-    except ValueError:
-        return ""
-    if idx < 0 or idx >= len(row_values):
-        return ""
-    return row_values[idx]
 
+def _emit_expr(node: PlanNode, ns: _Namespace, offset: int = 0) -> str:
+    """Render a plan node as a Python expression over ``row_values``.
 
-def _value_by_internal(
-    headers: List[str], row_values: List[Any], internal_to_display: Mapping[str, str], internal_key: str
-) -> Any:
-    display = internal_to_display.get(internal_key)
-    if not display:
-        return ""
-    return _cell_value_by_display(headers, row_values, display)
+    ``offset`` is the sheet column that ``row_values[0]`` holds.
+    """
+    if node.kind == "column":
+        i = node.col - offset
+        return f'(row_values[{i}] if n > {i} else "")'
+    if node.kind == "nested":
+        entries = [
+            f"{ns.bind(key, '_k')}: {_emit_expr(child, ns, offset)}"
+            for key, child in node.fields
+        ]
+        return "{" + ", ".join(entries) + "}"
+    if node.kind == "rule":
+        assert node.default is not None
+        # First matching rule wins: a if p0 else (b if p1 else default)
+        expr = _emit_expr(node.default, ns, offset)
+        for condition, operand, override in reversed(node.rules):
+            test = ns.shared.get(_condition_key(condition, operand))
+            if test is None:
+                test = (
+                    f"{ns.bind(condition, '_p')}({_emit_expr(operand, ns, offset)})"
+                )
+            expr = f"({_emit_expr(override, ns, offset)} if {test} else {expr})"
+        return expr
+    return ns.bind(node.value)
 
 
-def _resolve_field(
+def _build_function(
+    plan: PlanNode, name: str, span: Optional[Tuple[int, int]] = None
+) -> FieldResolver:
+    """Generate and compile ``name(row_values)`` evaluating ``plan``.
+
+    ``n`` holds ``len(row_values)`` for the bounds checks emitted by lookups.
+    With a column ``span``, rows are expected to start at its first column.
+    """
+    ns = _Namespace()
+    offset = span[0] if span is not None else 0
+
+    # A condition on the same operand used by several rules (typically the
+    # same "if" repeated across groups) is evaluated once per row into a local.
+    seen: Dict[Tuple[Any, ...], Tuple[Condition, PlanNode]] = {}
+    counts: Dict[Tuple[Any, ...], int] = {}
+    for node in _walk_plan(plan):
+        for condition, operand, _ in node.rules:
+            key = _condition_key(condition, operand)
+            seen.setdefault(key, (condition, operand))
+            counts[key] = counts.get(key, 0) + 1
+    lines = [f"def {name}(row_values):", "    n = len(row_values)"]
+    for key, (condition, operand) in seen.items():
+        if counts[key] > 1:
+            local = ns.shared[key] = f"_t{len(ns.shared)}"
+            lines.append(
+                f"    {local} = "
+                f"{ns.bind(condition, '_p')}({_emit_expr(operand, ns, offset)})"
+            )
+    lines.append(f"    return {_emit_expr(plan, ns, offset)}")
+    src = "\n".join(lines) + "\n"
+    scope = dict(ns.names)
+    exec(compile(src, f"<{name}>", "exec"), scope)
+    return scope[name]
+
+
+def _walk_plan(node: PlanNode) -> Iterator[PlanNode]:
+    yield node
+    for _, child in node.fields:
+        yield from _walk_plan(child)
+    for _, operand, override in node.rules:
+        yield from _walk_plan(operand)
+        yield from _walk_plan(override)
+    if node.default is not None:
+        yield from _walk_plan(node.default)
+
+
+def _condition_key(condition: Condition, operand: PlanNode) -> Tuple[Any, ...]:
+    # Operands are column reads or the "" / None constants, so these fields
+    # identify them; predicates are shared per expression text (lru_cache).
+    return (id(condition), operand.kind, operand.col, operand.value)
+
+
+def _plan_columns(node: PlanNode) -> Iterator[int]:
+    return (n.col for n in _walk_plan(node) if n.kind == "column")
+
+
+def _column_span(plans: Iterable[PlanNode]) -> Optional[Tuple[int, int]]:
+    """Inclusive (first, last) sheet columns the plans read, or None if none.
+
+    Rows are then read with ``min_col``/``max_col`` so unused leading and
+    trailing columns are never turned into values.
+    """
+    cols = [col for plan in plans for col in _plan_columns(plan)]
+    if not cols:
+        return None
+    return min(cols), max(cols)
+
+
+def _compile_lookup(
+    internal_key: str,
+    internal_to_col: Mapping[str, int],
+) -> PlanNode:
+    """Resolve an internal key to its column once."""
+    idx = internal_to_col.get(internal_key)
+    if idx is None:
+        return PlanNode("const", value="")
+    return PlanNode("column", col=idx)
+
+
+def _compile_operand(
+    internal_key: str,
+    internal_to_col: Mapping[str, int],
+    mapped_keys: AbstractSet[str],
+) -> PlanNode:
+    # Left side of an ex condition: a mapped key reads its cell ("" when the
+    # column is absent); a key missing from [map] compares as None.
+    if internal_key in mapped_keys:
+        return _compile_lookup(internal_key, internal_to_col)
+    return PlanNode("const", value=None)
+
+
+def _compile_field(
     field_key: str,
     spec: Any,
-    headers: List[str],
-    row_values: List[Any],
-    internal_to_display: Mapping[str, str],
-    context_by_internal: Mapping[str, Any],
-) -> Tuple[str, Any]:
-    """Resolve one field of an out-group into a key/value pair.
+    internal_to_col: Mapping[str, int],
+    mapped_keys: AbstractSet[str],
+) -> PlanNode:
+    """Compile one field of an out-group into a plan node.
 
     Supports:
     - Direct mapping: spec is a string referencing an internal key -> fetch cell.
     - Rule mapping: spec is an object with optional keys {name, value, ex}.
     - Nested objects: spec is an object whose keys are not limited to {name, value, ex};
-      in this case, recursively resolve each child to produce a nested dict. This supports
+      in this case, recursively compile each child to produce a nested dict. This supports
       multi-level nesting (情况三及更深层次)。
+
+    Everything that only depends on the spec (branching on its shape, column
+    positions, parsed ``ex`` rules and where their operands come from) is
+    settled here, once per transform call. ``mapped_keys`` are the internal
+    keys declared in [map].
     """
     # Special-case: __label__ should pass through as literal if provided
     if field_key == "__label__":
-        return field_key, (spec if isinstance(spec, str) else str(spec))
+        return PlanNode("const", value=spec if isinstance(spec, str) else str(spec))
 
     # Case 1: direct mapping (spec is internal key to fetch; output key is the field key)
     if isinstance(spec, str):
-        output_key = field_key
-        value = _value_by_internal(headers, row_values, internal_to_display, spec)
-        return output_key, value
+        return _compile_lookup(spec, internal_to_col)
 
     if isinstance(spec, dict):
         # Distinguish between a rule object {name?, value?, ex?} and a nested object
@@ -117,51 +333,183 @@ def _resolve_field(
         has_non_reserved_keys = any(k not in reserved for k in spec.keys())
 
         if has_non_reserved_keys:
-            # Treat as nested object: recursively resolve each child
-            nested: Dict[str, Any] = {}
-            for child_key, child_spec in spec.items():
-                ck, cv = _resolve_field(
-                    field_key=str(child_key),
-                    spec=child_spec,
-                    headers=headers,
-                    row_values=row_values,
-                    internal_to_display=internal_to_display,
-                    context_by_internal=context_by_internal,
-                )
-                nested[ck] = cv
-            return str(field_key), nested
+            # Treat as nested object: compile each child
+            return _compile_dict(spec.items(), internal_to_col, mapped_keys)
 
         # Otherwise, treat as rule mapping object
         name = spec.get("name")
-        value_ref = spec.get("value")
         ex = spec.get("ex")
-        # Evaluate ex condition to override value_ref
+        default = _compile_ref(spec.get("value"), internal_to_col)
+        rules: List[Tuple[Condition, PlanNode, PlanNode]] = []
         if ex:
             # normalize to list of one rule or many
-            rules = ex if isinstance(ex, list) else [ex]
-            for rule in rules:
+            for rule in ex if isinstance(ex, list) else [ex]:
                 if not isinstance(rule, dict):
                     continue
                 condition = rule.get("if")
-                if condition and _eval_condition(str(condition), context_by_internal):
-                    # Prefer explicit 'value' in rule; else accept a key matching name
-                    override = rule.get("value")
-                    if not override and name:
-                        override = rule.get(name)
-                    if override is not None:
-                        value_ref = override
-                        break
-        # Pull the value from the row by internal key reference
-        # Output key should be the field key in the [out] group; `name` is a logical name, not the output label.
-        output_key = str(field_key)
-        if isinstance(value_ref, str):
-            value = _value_by_internal(headers, row_values, internal_to_display, value_ref)
-        else:
-            value = value_ref
-        return output_key, value
+                if not condition:
+                    continue
+                # Prefer explicit 'value' in rule; else accept a key matching name
+                override = rule.get("value")
+                if not override and name:
+                    override = rule.get(name)
+                # A rule without an override never changes the value
+                if override is None:
+                    continue
+                compiled = _compile_condition(str(condition))
+                # Unknown expressions never match, so the rule can be dropped
+                if compiled is None:
+                    continue
+                left_key, predicate = compiled
+                rules.append(
+                    (
+                        predicate,
+                        _compile_operand(left_key, internal_to_col, mapped_keys),
+                        _compile_ref(override, internal_to_col),
+                    )
+                )
+        if not rules:
+            return default
+        return PlanNode("rule", rules=tuple(rules), default=default)
 
     # Fallback: emit as string
-    return str(field_key), str(spec)
+    return PlanNode("const", value=str(spec))
+
+
+def _compile_ref(value_ref: Any, internal_to_col: Mapping[str, int]) -> PlanNode:
+    # String references pull the value from the row by internal key; anything
+    # else is used as a literal value.
+    if isinstance(value_ref, str):
+        return _compile_lookup(value_ref, internal_to_col)
+    return PlanNode("const", value=value_ref)
+
+
+def _intern_key(key: Any) -> str:
+    # Output keys are shared by every row dict and looked up again by the
+    # writers (via compute_fieldnames); interning makes those identity hits.
+    return sys.intern(str(key))
+
+
+def _compile_dict(
+    items: Iterable[Tuple[Any, Any]],
+    internal_to_col: Mapping[str, int],
+    mapped_keys: AbstractSet[str],
+) -> PlanNode:
+    return PlanNode(
+        "nested",
+        fields=tuple(
+            (
+                _intern_key(key),
+                _compile_field(str(key), spec, internal_to_col, mapped_keys),
+            )
+            for key, spec in items
+        ),
+    )
+
+
+def _compile_group(
+    group: Mapping[str, Any],
+    internal_to_col: Mapping[str, int],
+    mapped_keys: AbstractSet[str],
+    *,
+    skip_key: Optional[str] = None,
+) -> PlanNode:
+    return _compile_dict(
+        ((key, spec) for key, spec in group.items() if str(key) != skip_key),
+        internal_to_col,
+        mapped_keys,
+    )
+
+
+def _open_sheet(
+    excel_path: str, sheet_name: Optional[str], header_row: int
+) -> Tuple[Any, Any, List[str]]:
+    """Open the workbook read-only and return (workbook, worksheet, headers).
+
+    Read-only worksheets stream cells from the sheet XML and do not support
+    cheap random access (``ws[r]``) or a reliable ``max_row``, so data rows
+    are later consumed in a single forward pass (see :func:`_read_rows`).
+    """
+    with _suppress_openpyxl_default_style_warning():
+        wb = load_workbook(excel_path, data_only=True, read_only=True)
+    ws = wb[sheet_name] if sheet_name else wb.active
+
+    # values_only yields plain tuples and skips per-cell wrapper objects.
+    header_values = next(
+        ws.iter_rows(min_row=header_row, max_row=header_row, values_only=True), ()
+    )
+    headers = [str(v) if v is not None else "" for v in header_values]
+    return wb, ws, headers
+
+
+def _read_rows(
+    wb: Any,
+    ws: Any,
+    header_row: int,
+    row_numbers: Optional[Sequence[int]],
+    span: Optional[Tuple[int, int]] = None,
+) -> Iterator[Sequence[Any]]:
+    """Return the data row stream below ``header_row``.
+
+    ``span`` is an inclusive 0-based (first, last) column range; when given,
+    each row tuple only holds those columns, starting at ``first``.
+    """
+    # With a row selection, only the span between the first and last wanted
+    # rows is materialized. Row 0 (or below) reaches back to the header row
+    # and above, as indexing the worksheet directly did.
+    first_row = header_row + 1
+    max_row = None
+    if row_numbers:
+        first_row = max(1, header_row + min(row_numbers))
+        max_row = header_row + max(row_numbers)
+    min_col = max_col = None
+    blank: Tuple[Any, ...] = ()
+    if span is not None:
+        min_col, max_col = span[0] + 1, span[1] + 1
+        blank = (None,) * (max_col - min_col + 1)
+    rows = ws.iter_rows(
+        min_row=first_row,
+        max_row=max_row,
+        min_col=min_col,
+        max_col=max_col,
+        values_only=True,
+    )
+    return _iter_data_rows(wb, rows, first_row, header_row, row_numbers, blank)
+
+
+def _iter_data_rows(
+    wb: Any,
+    rows: Iterator[Sequence[Any]],
+    first_row: int,
+    header_row: int,
+    row_numbers: Optional[Sequence[int]],
+    blank: Sequence[Any] = (),
+) -> Iterator[Sequence[Any]]:
+    """Yield data row values; closes the workbook once the stream is exhausted.
+
+    ``rows`` starts at worksheet row ``first_row``.
+
+    When ``row_numbers`` is given (1-based, excluding the header row), the
+    requested rows are collected during the pass and yielded in the requested
+    order, duplicates included. Rows past the end of the sheet yield ``blank``
+    (all-``None`` cells over the read span), so their fields resolve to
+    ``None`` like empty cells.
+    """
+    try:
+        if not row_numbers:
+            yield from rows
+            return
+        wanted = {header_row + n for n in row_numbers}
+        picked: Dict[int, Sequence[Any]] = {}
+        for r, row_values in enumerate(rows, start=first_row):
+            if r in wanted:
+                picked[r] = row_values
+                if len(picked) == len(wanted):
+                    break
+        for n in row_numbers:
+            yield picked.get(header_row + n, blank)
+    finally:
+        wb.close()
 
 
 def transform_rows(
@@ -176,49 +524,36 @@ def transform_rows(
 
     For each source row, each out-group produces one output record.
     """
-    with _suppress_openpyxl_default_style_warning():
-        wb = load_workbook(excel_path, data_only=True)
-    ws = wb[sheet_name] if sheet_name else wb.active
-
-    # Read headers from header_row
-    headers: List[str] = []
-    for cell in ws[header_row]:
-        headers.append(str(cell.value) if cell.value is not None else "")
+    return list(
+        iter_transform_rows(
+            excel_path,
+            display_to_internal,
+            out_groups,
+            sheet_name=sheet_name,
+            header_row=header_row,
+            row_numbers=row_numbers,
+        )
+    )
 
-    internal_to_display = _build_internal_to_display(display_to_internal)
 
-    results: List[Dict[str, Any]] = []
+def iter_transform_rows(
+    excel_path: str,
+    display_to_internal: Mapping[str, str],
+    out_groups: Sequence[Mapping[str, Any]],
+    sheet_name: Optional[str] = None,
+    header_row: int = 1,
+    row_numbers: Optional[Sequence[int]] = None,  # 1-based, excluding header row
+) -> Iterator[Dict[str, Any]]:
+    """Streaming form of :func:`transform_rows`.
 
-    # Build iterable of row indices to process (1-based including header in ws indexing)
-    start_row_idx = header_row + 1
-    end_row_idx = ws.max_row
-    indices = range(start_row_idx, end_row_idx + 1)
-    if row_numbers:
-        # Convert to worksheet row indexes
-        indices = [header_row + n for n in row_numbers]
-
-    for r in indices:
-        row_cells = ws[r]
-        row_values = [c.value for c in row_cells]
-        # Context by internal keys for condition evaluation
-        context = {internal: _value_by_internal(headers, row_values, internal_to_display, internal)
-                   for internal in internal_to_display.keys()}
-
-        for group in out_groups:
-            out: Dict[str, Any] = {}
-            for key, spec in group.items():
-                out_key, out_val = _resolve_field(
-                    field_key=str(key),
-                    spec=spec,
-                    headers=headers,
-                    row_values=row_values,
-                    internal_to_display=internal_to_display,
-                    context_by_internal=context,
-                )
-                out[out_key] = out_val
-            results.append(out)
+    The workbook is opened and the config compiled before this returns; the
+    returned iterator then reads and transforms one source row at a time.
+    """
+    wb, ws, headers = _open_sheet(excel_path, sheet_name, header_row)
+    compiled, span = _compile_transform(headers, display_to_internal, out_groups)
 
-    return results
+    rows = _read_rows(wb, ws, header_row, row_numbers, span)
+    return _generate_records(rows, compiled)
 
 
 def transform_rows_grouped(
@@ -240,118 +575,241 @@ def transform_rows_grouped(
       object (excluding the reserved label key).
     - Result: each row yields a single dict like {label1: {...}, label2: {...}}.
     """
-    with _suppress_openpyxl_default_style_warning():
-        wb = load_workbook(excel_path, data_only=True)
-    ws = wb[sheet_name] if sheet_name else wb.active
+    return list(
+        iter_transform_rows_grouped(
+            excel_path,
+            display_to_internal,
+            out_groups,
+            sheet_name=sheet_name,
+            header_row=header_row,
+            row_numbers=row_numbers,
+            group_label_key=group_label_key,
+        )
+    )
 
-    # Read headers from header_row
-    headers: List[str] = []
-    for cell in ws[header_row]:
-        headers.append(str(cell.value) if cell.value is not None else "")
 
-    internal_to_display = _build_internal_to_display(display_to_internal)
+def iter_transform_rows_grouped(
+    excel_path: str,
+    display_to_internal: Mapping[str, str],
+    out_groups: Sequence[Mapping[str, Any]],
+    sheet_name: Optional[str] = None,
+    header_row: int = 1,
+    row_numbers: Optional[Sequence[int]] = None,  # 1-based, excluding header row
+    *,
+    group_label_key: str = "__label__",
+) -> Iterator[Dict[str, Any]]:
+    """Streaming form of :func:`transform_rows_grouped` (one dict per row)."""
+    wb, ws, headers = _open_sheet(excel_path, sheet_name, header_row)
+    compiled, span = _compile_transform(
+        headers, display_to_internal, out_groups, group_label_key
+    )
 
-    results: List[Dict[str, Any]] = []
+    rows = _read_rows(wb, ws, header_row, row_numbers, span)
+    return map(compiled[0], rows)
 
-    # Build iterable of row indices to process (1-based including header in ws indexing)
-    start_row_idx = header_row + 1
-    end_row_idx = ws.max_row
-    indices = range(start_row_idx, end_row_idx + 1)
-    if row_numbers:
-        # Convert to worksheet row indexes
-        indices = [header_row + n for n in row_numbers]
-
-    for r in indices:
-        row_cells = ws[r]
-        row_values = [c.value for c in row_cells]
-        # Context by internal keys for condition evaluation
-        context = {
-            internal: _value_by_internal(headers, row_values, internal_to_display, internal)
-            for internal in internal_to_display.keys()
-        }
-
-        grouped: Dict[str, Any] = {}
-        for idx, group in enumerate(out_groups):
-            label = None
-            if isinstance(group, dict) and group_label_key in group and isinstance(group[group_label_key], str):
-                label = str(group[group_label_key])
-            if not label:
-                label = f"group{idx + 1}"
 
-            obj: Dict[str, Any] = {}
+CompiledTransform = Tuple[List[FieldResolver], Optional[Tuple[int, int]]]
+
+# Compiled transforms keyed by (headers, mapping, out_groups repr, label key)
+# (LRU). Not synchronised: transforms are compiled once per CLI run, not from
+# worker threads.
+_COMPILED_CACHE_SIZE = 32
+_compiled_cache: "OrderedDict[Tuple[Any, ...], CompiledTransform]" = OrderedDict()
+
+
+def _compile_transform(
+    headers: Sequence[str],
+    display_to_internal: Mapping[str, str],
+    out_groups: Sequence[Mapping[str, Any]],
+    group_label_key: Optional[str] = None,
+) -> CompiledTransform:
+    """Compile the config against a header layout into (resolvers, span).
+
+    Without ``group_label_key`` there is one resolver per out-group
+    (``transform_rows``); with it, a single resolver builds the grouped
+    record. Results are kept in a small LRU cache, so batch jobs running
+    the same config over many same-shaped sheets compile it once. The key
+    uses ``repr(out_groups)``, so a config mutated in place is recompiled.
+    """
+    key = (
+        tuple(headers),
+        tuple(display_to_internal.items()),
+        repr(out_groups),
+        group_label_key,
+    )
+    cached = _compiled_cache.get(key)
+    if cached is not None:
+        _compiled_cache.move_to_end(key)
+        return cached
+
+    col_idx = _build_column_index(headers)
+    internal_to_display = _build_internal_to_display(display_to_internal)
+    internal_to_col = _build_internal_to_col(col_idx, internal_to_display)
+    mapped_keys = internal_to_display.keys()
+
+    if group_label_key is None:
+        plans = [
+            _compile_group(group, internal_to_col, mapped_keys) for group in out_groups
+        ]
+        names = [f"_out_group{idx + 1}" for idx in range(len(plans))]
+    else:
+        groups: List[Tuple[str, PlanNode]] = []
+        for idx, group in enumerate(out_groups):
+            label = _group_label(group, idx, group_label_key)
+            fields = PlanNode("nested")
             if isinstance(group, Mapping):
-                for key, spec in group.items():
-                    if str(key) == group_label_key:
-                        continue  # skip label from object content
-                    out_key, out_val = _resolve_field(
-                        field_key=str(key),
-                        spec=spec,
-                        headers=headers,
-                        row_values=row_values,
-                        internal_to_display=internal_to_display,
-                        context_by_internal=context,
-                    )
-                    obj[out_key] = out_val
-            grouped[label] = obj
+                # skip label from object content
+                fields = _compile_group(
+                    group,
+                    internal_to_col,
+                    mapped_keys,
+                    skip_key=group_label_key,
+                )
+            groups.append((label, fields))
+        # One generated function builds the whole {label: {...}} record per row
+        plans = [PlanNode("nested", fields=tuple(groups))]
+        names = ["_out_row"]
+
+    span = _column_span(plans)
+    compiled = (
+        [_build_function(plan, name, span) for plan, name in zip(plans, names)],
+        span,
+    )
+    _compiled_cache[key] = compiled
+    if len(_compiled_cache) > _COMPILED_CACHE_SIZE:
+        _compiled_cache.popitem(last=False)
+    return compiled
+
+
+def _group_label(group: Any, idx: int, group_label_key: str) -> str:
+    label = None
+    if isinstance(group, dict) and group_label_key in group and isinstance(group[group_label_key], str):
+        label = str(group[group_label_key])
+    if not label:
+        label = f"group{idx + 1}"
+    return sys.intern(label)
+
+
+def compute_fieldnames(
+    out_groups: Sequence[Mapping[str, Any]],
+    *,
+    grouped: bool,
+    group_label_key: str = "__label__",
+) -> List[str]:
+    """Output columns implied by the config, in first-seen order.
 
-        results.append(grouped)
+    With ``grouped=True`` these are the group labels used by
+    ``transform_rows_grouped``; otherwise the union of top-level [out] keys
+    produced by ``transform_rows``. Passing the result to
+    ``write_csv``/``write_xlsx`` lets them stream rows without a header pass.
+    """
+    if grouped:
+        names = (
+            _group_label(group, idx, group_label_key)
+            for idx, group in enumerate(out_groups)
+        )
+    else:
+        names = (_intern_key(key) for group in out_groups for key in group)
+    return list(dict.fromkeys(names))
+
+
+def _generate_records(
+    rows: Iterable[Sequence[Any]], resolvers: Sequence[FieldResolver]
+) -> Iterator[Dict[str, Any]]:
+    for row_values in rows:
+        for resolve in resolvers:
+            yield resolve(row_values)
 
-    return results
+
+def _collect_fieldnames(rows: Iterable[Mapping[str, Any]]) -> List[str]:
+    """Header order by first-seen key across rows.
+
+    This preserves the [out] group/field sequence from config (JSON object
+    order is preserved). A dict keeps the de-dup O(1) per key instead of
+    scanning the header list.
+    """
+    seen: Dict[str, None] = {}
+    for r in rows:
+        seen.update(dict.fromkeys(r))
+    return list(seen)
 
 
-def write_csv(path: str, rows: List[Dict[str, Any]], *, compact_json: bool = True) -> None:
+def _rows_and_fieldnames(
+    rows: Iterable[Mapping[str, Any]], fieldnames: Optional[Sequence[str]]
+) -> Tuple[Iterable[Mapping[str, Any]], List[str]]:
+    # Without known fieldnames the header needs a full pass first, so a
+    # streamed input is materialized; with them, rows are consumed once.
+    if fieldnames is not None:
+        return rows, list(fieldnames)
+    if not isinstance(rows, list):
+        rows = list(rows)
+    return rows, _collect_fieldnames(rows)
+
+
+def write_csv(
+    path: str,
+    rows: Iterable[Mapping[str, Any]],
+    *,
+    compact_json: bool = True,
+    fieldnames: Optional[Sequence[str]] = None,
+) -> None:
+    """Write rows to CSV; ``rows`` may be any iterable, e.g. a streaming
+    ``iter_transform_rows*`` result.
+
+    When ``fieldnames`` is given it fixes the columns (keys outside it are
+    dropped) and rows are written as they arrive; otherwise columns are
+    collected from all rows first.
+    """
     import csv
 
+    encode = _COMPACT_JSON if compact_json else _PRETTY_JSON
+
     # Helper: convert any complex value to JSON string (pretty or compact)
     def _to_json_str(v: Any) -> str:
+        # Plain text cells are the common case and need no conversion
+        if type(v) is str:
+            return v
         if v is None:
             return ""
         # For containers and non-primitive types, dump as pretty JSON
         if isinstance(v, (dict, list, tuple, set)):
             try:
-                to_dump = list(v) if isinstance(v, set) else v
-                if compact_json:
-                    return json.dumps(to_dump, ensure_ascii=False, separators=(",", ":"))
-                return json.dumps(to_dump, ensure_ascii=False, indent=2)
+                return encode(list(v) if isinstance(v, set) else v)
             except Exception:
-                return json.dumps(str(v), ensure_ascii=False)
-        # Primitives: keep as-is but ensure string type for CSV safety
-        if isinstance(v, (int, float, bool, str)):
-            return str(v)
-        # Fallback to string
+                return _COMPACT_JSON(str(v))
+        # Primitives and anything else: ensure string type for CSV safety
         return str(v)
 
-    # Build header order by first-seen key order across rows, preserving
-    # the group/field order from config (JSON object order is preserved).
-    fieldnames: List[str] = []
-    for r in rows:
-        for k in r.keys():
-            if k not in fieldnames:
-                fieldnames.append(k)
-    with open(path, "w", encoding="utf-8-sig", newline="") as f:
-        writer = csv.DictWriter(
+    rows, fieldnames = _rows_and_fieldnames(rows, fieldnames)
+    with open(
+        path, "w", encoding="utf-8-sig", newline="", buffering=_WRITE_BUFFER_SIZE
+    ) as f:
+        writer = csv.writer(
             f,
-            fieldnames=fieldnames,
             quoting=csv.QUOTE_ALL,  # quote all to avoid delimiter/newline induced misalignment
             lineterminator="\n",
         )
-        writer.writeheader()
-        for r in rows:
-            serialized = {k: _to_json_str(r.get(k, "")) for k in fieldnames}
-            writer.writerow(serialized)
-
-
-def write_xlsx(path: str, rows: List[Dict[str, Any]], *, compact_json: bool = True) -> None:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "output"
-    # Build header order by first-seen key order across rows to reflect
-    # the [out] group/field sequence in config.
-    headers: List[str] = []
-    for r in rows:
-        for k in r.keys():
-            if k not in headers:
-                headers.append(k)
+        writer.writerow(fieldnames)
+        writer.writerows(
+            [_to_json_str(r.get(k, "")) for k in fieldnames] for r in rows
+        )
+
+
+def write_xlsx(
+    path: str,
+    rows: Iterable[Mapping[str, Any]],
+    *,
+    compact_json: bool = True,
+    fieldnames: Optional[Sequence[str]] = None,
+) -> None:
+    """Write rows to a single "output" sheet; see :func:`write_csv` for how
+    ``rows`` and ``fieldnames`` are consumed."""
+    rows, headers = _rows_and_fieldnames(rows, fieldnames)
+    # write_only streams rows straight to the sheet XML instead of keeping a
+    # Cell object per value until save().
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("output")
+    encode = _COMPACT_JSON if compact_json else _PRETTY_JSON
     ws.append(headers)
     # Helper: ensure cell-friendly values; complex values -> pretty JSON string
     def _cell_safe(v: Any) -> Any:
@@ -362,10 +820,7 @@ def write_xlsx(path: str, rows: List[Dict[str, Any]], *, compact_json: bool = Tr
             return v
         # Convert containers and other types to pretty JSON string
         try:
-            to_dump = list(v) if isinstance(v, set) else v
-            if compact_json:
-                return json.dumps(to_dump, ensure_ascii=False, separators=(",", ":"))
-            return json.dumps(to_dump, ensure_ascii=False, indent=2)
+            return encode(list(v) if isinstance(v, set) else v)
         except Exception:
             return str(v)
 
@@ -375,12 +830,41 @@ def write_xlsx(path: str, rows: List[Dict[str, Any]], *, compact_json: bool = Tr
         wb.save(path)
 
 
-def print_terminal(rows: List[Dict[str, Any]], pretty: bool = False) -> None:
-    for r in rows:
-        if pretty:
-            print(json.dumps(r, ensure_ascii=False, indent=2))
-        else:
-            print(json.dumps(r, ensure_ascii=False))
+def print_terminal(rows: Iterable[Mapping[str, Any]], pretty: bool = False) -> None:
+    encode = _PRETTY_JSON if pretty else _TERMINAL_JSON
+    out = sys.stdout
+    it = iter(rows)
+    # One write per batch of rows instead of one print() per row
+    while True:
+        batch = list(islice(it, _PRINT_BATCH_ROWS))
+        if not batch:
+            break
+        out.write("".join(encode(r) + "\n" for r in batch))
+    out.flush()
+
+
+_DEFAULT_STYLE_WARNING = "Workbook contains no default style, apply openpyxl's default"
+_DEFAULT_STYLE_MODULE = r"openpyxl\.styles\.stylesheet"
+_default_style_filter_installed = False
+
+
+def install_openpyxl_warning_filter() -> None:
+    """Ignore openpyxl's "no default style" warning for the whole process.
+
+    Opt-in for batch drivers that read or write many workbooks: once
+    installed, the per-call suppression below is skipped, avoiding a
+    ``warnings.catch_warnings()`` snapshot around every load and save.
+    """
+    global _default_style_filter_installed
+    if _default_style_filter_installed:
+        return
+    warnings.filterwarnings(
+        "ignore",
+        message=_DEFAULT_STYLE_WARNING,
+        category=UserWarning,
+        module=_DEFAULT_STYLE_MODULE,
+    )
+    _default_style_filter_installed = True
 
 
 @contextmanager
@@ -389,12 +873,16 @@ def _suppress_openpyxl_default_style_warning():
 
     Message: "Workbook contains no default style, apply openpyxl's default"
     Scope-limited to openpyxl.styles.stylesheet and only this specific message.
+    A no-op once install_openpyxl_warning_filter() has been called.
     """
+    if _default_style_filter_installed:
+        yield
+        return
     with warnings.catch_warnings():
         warnings.filterwarnings(
             "ignore",
-            message="Workbook contains no default style, apply openpyxl's default",
+            message=_DEFAULT_STYLE_WARNING,
             category=UserWarning,
-            module=r"openpyxl\.styles\.stylesheet",
+            module=_DEFAULT_STYLE_MODULE,
         )
         yield
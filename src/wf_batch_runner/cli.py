@@ -5,7 +5,7 @@
 wf_batch_runner.cli
 批量读取 Excel/CSV，逐行调用工作流接口，并把结果写回 Excel/CSV。
 - 支持 --tee 将结果也友好地打印到终端（每列一行，便于人工快速查看）。
-- 自动检测输入/输出文件类型（.xlsx/.xls/.csv）。
+- 自动检测输入（.xlsx/.xls/.csv）/输出（.xlsx/.csv）文件类型。
 - 输入至少包含：input, check 两列；可选 user 列；列名可用参数重定义。
 - check 列为原始 JSON 时会解析并序列化为“JSON 字符串”提交（满足你提到的转义要求）。
 - 返回 llm_out/llm_judge 若为 Markdown 包裹的 JSON，会自动提取并美化。
@@ -13,15 +13,30 @@ wf_batch_runner.cli
 from __future__ import annotations
 
 import argparse
+import csv
+import functools
 import json
 import math
+import os
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 import requests
+from openpyxl import Workbook, load_workbook
+from urllib3.util.retry import Retry
+
+# 共享的编码器：逐行多次序列化时避免每次 json.dumps 重新构造 JSONEncoder
+_COMPACT_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+# 请求体编码：与 requests 的 json= 一致，NaN/Infinity 不是合法 JSON，直接报错而不发送
+_REQUEST_JSON = json.JSONEncoder(
+    ensure_ascii=False, separators=(",", ":"), allow_nan=False
+).encode
+_PRETTY_JSON = json.JSONEncoder(ensure_ascii=False, indent=2).encode
 
 
 def _is_nan(x: Any) -> bool:
@@ -37,14 +52,311 @@ def _read_table(path: Path) -> pd.DataFrame:
     raise ValueError(f"仅支持 .xlsx/.xls/.csv，当前：{path}")
 
 
-def _write_table(df: pd.DataFrame, path: Path) -> None:
+# 可写出的输出格式（pandas 2 已无 .xls 写出引擎）
+_OUTPUT_SUFFIXES = (".xlsx", ".csv")
+
+
+def _check_output_path(path: Path) -> None:
+    """输出扩展名校验：在发起任何请求前调用，避免跑完才发现无法写出。"""
+    if path.suffix.lower() not in _OUTPUT_SUFFIXES:
+        raise ValueError(f"输出仅支持 .xlsx/.csv，当前：{path}")
+
+
+# pandas.read_csv 默认视为缺失值的标记（na_values 默认集合）
+_CSV_NA_VALUES = frozenset(
+    [
+        "",
+        "#N/A",
+        "#N/A N/A",
+        "#NA",
+        "-1.#IND",
+        "-1.#QNAN",
+        "-NaN",
+        "-nan",
+        "1.#IND",
+        "1.#QNAN",
+        "<NA>",
+        "N/A",
+        "NA",
+        "NULL",
+        "NaN",
+        "None",
+        "n/a",
+        "nan",
+        "null",
+    ]
+)
+
+
+def _dedupe_columns(columns: Iterable[Any]) -> List[Any]:
+    """按 pandas 的规则给重复列名加后缀：x, x → x, x.1。
+    表头里已有 x.1 时顺延为 x.2，与 pandas.read_csv/read_excel 的结果一致。
+    """
+    names = list(columns)
+    taken = set(names)
+    counts: Dict[Any, int] = {}
+    out: List[Any] = []
+    for col in names:
+        base = col
+        cur = counts.get(col, 0)
+        while cur > 0:
+            counts[base] = cur + 1
+            col = f"{base}.{cur}"
+            cur = cur + 1 if col in taken else counts.get(col, 0)
+        out.append(col)
+        counts[col] = cur + 1
+    return out
+
+
+def _read_input_rows(path: Path) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """读取输入表为 (列名, 行 dict 列表)。
+    CSV 直接用 csv 模块读取，不经 pandas 类型推断：单元格保持原文本（如 "007"
+    不会变成 7，数字也按字符串发送）；空单元格及 NA/N/A/null/NaN 等 pandas 默认
+    缺失标记记为 None。空列名记为 "Unnamed: i"，重复列名按 pandas 规则加 .1/.2 后缀。
+    .xlsx 用 openpyxl 只读模式按行读取首个工作表（不构造 DataFrame）；.xls 仍经 pandas。
+    """
     suf = path.suffix.lower()
-    if suf in (".xlsx", ".xls"):
-        df.to_excel(path, index=False)
-    elif suf == ".csv":
-        df.to_csv(path, index=False)
+    if suf == ".csv":
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return [], []
+            columns = _dedupe_columns(
+                c if c != "" else f"Unnamed: {i}" for i, c in enumerate(header)
+            )
+            width = len(columns)
+            na = _CSV_NA_VALUES
+            rows = [
+                dict(zip(columns, [None if v in na else v for v in r] + [None] * width))
+                for r in reader
+                if r  # 跳过空行，与 pandas 一致
+            ]
+            return columns, rows
+    if suf == ".xlsx":
+        return _read_xlsx_rows(path)
+    df = _read_table(path)
+    return list(df.columns), df.to_dict(orient="records")
+
+
+def _read_xlsx_rows(path: Path) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    # data_only：公式单元格取缓存值，与 pandas.read_excel 一致
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        it = wb.worksheets[0].iter_rows(values_only=True)
+        header_row = next(it, None)
+        if header_row is None:
+            return [], []
+        header = list(header_row)
+        data: List[Tuple[Any, ...]] = []
+        blank = 0
+        for values in it:
+            if all(v is None for v in values):
+                blank += 1
+            else:
+                # 中间的空行保留为缺失行；末尾的空行丢弃
+                data.extend(() for _ in range(blank))
+                blank = 0
+                data.append(tuple(values))
+        # 超出表头宽度的单元格与 pandas 一样补成 "Unnamed: i" 列，而不是丢弃
+        width = max([len(header)] + [len(v) for v in data])
+        header += [None] * (width - len(header))
+        # 空表头与重复表头按 pandas 的惯例命名（Unnamed: i / x.1）
+        columns = _dedupe_columns(
+            f"Unnamed: {i}" if c is None else c for i, c in enumerate(header)
+        )
+        rows = [dict(zip(columns, v + (None,) * (width - len(v)))) for v in data]
+        return columns, rows
+    finally:
+        wb.close()
+
+
+def _write_xlsx_rows(path: Path, columns: Iterable[Any], rows: Iterable[List[Any]]) -> None:
+    """write_only 直接流式写出行 XML，不为每个单元格构造带样式的 Cell 对象。
+    行可短于表头（缺失的尾部列留空）。"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append([str(c) for c in columns])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def _replace_xlsx(path: Path, columns: Iterable[str], rows: List[List[Any]]) -> None:
+    # 先写同目录 .part 临时文件再原子替换，中断时目标文件始终完整
+    part = path.with_name(path.name + ".part")
+    _write_xlsx_rows(part, columns, rows)
+    os.replace(part, path)
+
+
+class _StreamingTableWriter:
+    """逐行写出结果表（非 fast-append 路径）。
+    - CSV：保持文件句柄打开，经 csv.writer 缓冲追加，每 flush_every 行 flush 一次；
+      若出现新列（include_all 动态列），按扩展后的表头把已写内容重写一次，之后继续追加。
+    - Excel：无法追加写入，保留已写行（按列顺序的值列表，不经 DataFrame），
+      每 flush_every 行及 close() 时整体重写（经 .part 临时文件原子替换）。
+    """
+
+    def __init__(
+        self, path: Path, columns: Optional[List[str]] = None, flush_every: int = 50
+    ) -> None:
+        _check_output_path(path)
+        self.path = path
+        self.is_csv = path.suffix.lower() == ".csv"
+        # dict 保序去重：列集合随新行增量扩展
+        self.columns: Dict[str, None] = dict.fromkeys(columns or ())
+        self.flush_every = max(1, flush_every)
+        self._rows: List[List[Any]] = []
+        self._pending = 0
+        self._fh: Optional[Any] = None
+        self._writer: Optional[Any] = None
+
+    def write_row(self, row: Dict[str, Any]) -> None:
+        new_cols = [k for k in row if k not in self.columns]
+        self.columns.update(dict.fromkeys(new_cols))
+        if not self.is_csv:
+            # 列只会在末尾追加，旧行的值位置不变；较早的短行尾部留空即可
+            self._rows.append([row.get(k, "") for k in self.columns])
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self.flush()
+            return
+        if self._fh is None or new_cols:
+            self._rewrite_csv()
+        self._writer.writerow([row.get(k, "") for k in self.columns])
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self._fh.flush()
+            self._pending = 0
+
+    def _rewrite_csv(self) -> None:
+        # 首次打开写表头；出现新列时读回已写行，按新表头补齐后重写
+        old_rows: List[List[str]] = []
+        if self._fh is not None:
+            self._fh.close()
+            self._pending = 0
+            with open(self.path, "r", newline="", encoding="utf-8") as f:
+                old_rows = list(csv.reader(f))[1:]
+        self._fh = open(self.path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._fh, lineterminator="\n")
+        self._writer.writerow(self.columns)
+        self._writer.writerows(old_rows)
+        self._fh.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        if self.is_csv:
+            self._fh.flush()
+        else:
+            _replace_xlsx(self.path, self.columns, self._rows)
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def _read_existing_output(path: Path) -> Tuple[List[str], List[List[Any]]]:
+    """读取 fast-append 的既有输出为 (表头, 数据行值列表)，跳过全空行。
+    Excel 用 openpyxl 只读模式流式读取，不经 DataFrame。"""
+    if path.suffix.lower() == ".csv":
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            rows: List[List[Any]] = [r for r in csv.reader(f) if any(r)]
     else:
-        raise ValueError(f"输出仅支持 .xlsx/.xls/.csv，当前：{path}")
+        wb = load_workbook(path, read_only=True)
+        try:
+            ws = wb.active
+            rows = [list(r) for r in ws.iter_rows(values_only=True) if any(v is not None for v in r)]
+        finally:
+            wb.close()
+    if not rows:
+        raise ValueError(f"既有输出为空：{path}")
+    header = ["" if c is None else str(c) for c in rows[0]]
+    return header, rows[1:]
+
+
+class _AppendTableWriter:
+    """fast-append 模式的写出：续写既有输出。
+    表头固定为既有文件表头（无既有文件时取首行的键序），之后出现的新列被忽略并提示一次。
+    - CSV：整个运行期间保持一个文件句柄，逐行写入并 flush（首行写表头）。
+    - Excel：行以值列表保存在内存，每 flush_every 行及 close() 时经 write-only 工作簿
+      写入同目录的 .part 临时文件，再原子替换目标文件，中断时目标文件始终完整。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        columns: Optional[List[str]],
+        rows: List[List[Any]],
+        flush_every: int = 50,
+    ) -> None:
+        _check_output_path(path)
+        self.path = path
+        self.is_csv = path.suffix.lower() == ".csv"
+        self.columns = columns
+        self.processed = len(rows)
+        self.flush_every = max(1, flush_every)
+        # CSV 直接追加到文件，无需保留既有行
+        self._rows = [] if self.is_csv else rows
+        self._pending = 0
+        self._warned_extra = False
+        self._fh: Optional[Any] = None
+        self._writer: Optional[Any] = None
+
+    def write_row(self, row: Dict[str, Any]) -> None:
+        # 确定输出列：优先沿用既有文件列；否则以当前行的键顺序为列
+        if self.columns is None:
+            self.columns = list(row)
+        # 处理潜在的“新列”（include_all 导致的动态列）
+        if not self._warned_extra:
+            extra = [k for k in row if k not in self.columns]
+            if extra:
+                print(f"⚠️ fast-append: 检测到未在表头中的新列，将被忽略：{', '.join(extra)}")
+                self._warned_extra = True
+        values = [row.get(k, "") for k in self.columns]
+        if self.is_csv:
+            if self._fh is None:
+                self._open_csv()
+            self._writer.writerow(values)
+            self._fh.flush()
+        else:
+            self._rows.append(values)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self.flush()
+        self.processed += 1
+
+    def _open_csv(self) -> None:
+        # 既有数据行时追加；新文件或仅有表头时重写并写表头
+        append = self.processed > 0
+        self._fh = open(self.path, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._fh, lineterminator="\n")
+        if not append:
+            self._writer.writerow(self.columns)
+
+    def flush(self) -> None:
+        if self.is_csv or not self._pending:
+            return
+        _replace_xlsx(self.path, self.columns or [], self._rows)
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+# JSON 值（含 Python json 接受的 NaN/Infinity）可能的首字符
+_JSON_VALUE_START = frozenset('{["-0123456789tfnNI')
+
+
+def _looks_like_json(s: str) -> bool:
+    """廉价预判：形如 {...} 或 [...] 的文本才值得交给 json.loads。"""
+    return len(s) >= 2 and s[0] in "{[" and s[-1] in "}]"
 
 
 def _try_parse_json_maybe_markdown(text: str) -> Tuple[Optional[Any], Optional[str]]:
@@ -53,24 +365,48 @@ def _try_parse_json_maybe_markdown(text: str) -> Tuple[Optional[Any], Optional[s
         return None, None
     s = str(text).strip()
 
-    # 直接当 JSON
+    # 直接当 JSON（首字符不可能开始一个 JSON 值时跳过，免去必然失败的解析）
+    if s[:1] in _JSON_VALUE_START:
+        ok, obj, pretty = _parse_json_pretty(s)
+        if ok:
+            return obj, pretty
+
+    # 提取 { ... }：首个 "{" 到最后一个 "}"（与原贪婪匹配一致，但无需正则回溯）
+    start = s.find("{")
+    end = s.rfind("}")
+    if start >= 0 and end > start:
+        ok, obj, pretty = _parse_json_pretty(s[start : end + 1])
+        if ok:
+            return obj, pretty
+
+    return None, s
+
+
+# 只缓存短文本（如 check 列、固定判定结果等常整列重复的片段）；模型长输出几乎
+# 每行都不同，缓存命中率低却会长期占住原文、对象与美化副本，直接解析即可
+_JSON_CACHE_MAX_LEN = 512
+
+
+def _parse_json_pretty(s: str) -> Tuple[bool, Any, Optional[str]]:
+    """json.loads 并美化；失败返回 (False, None, None)。
+    短文本按文本缓存，返回的对象可能在多行间共享，调用方只读取、不修改。
+    """
+    if len(s) <= _JSON_CACHE_MAX_LEN:
+        return _parse_json_pretty_cached(s)
+    return _parse_json_pretty_uncached(s)
+
+
+def _parse_json_pretty_uncached(s: str) -> Tuple[bool, Any, Optional[str]]:
     try:
         obj = json.loads(s)
-        return obj, json.dumps(obj, ensure_ascii=False, indent=2)
     except Exception:
-        pass
+        return False, None, None
+    return True, obj, _PRETTY_JSON(obj)
 
-    # 提取 { ... }
-    m = re.search(r"\{.*\}", s, flags=re.S | re.M)
-    if m:
-        inner = m.group(0)
-        try:
-            obj = json.loads(inner)
-            return obj, json.dumps(obj, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
 
-    return None, s
+_parse_json_pretty_cached = functools.lru_cache(maxsize=256)(
+    _parse_json_pretty_uncached
+)
 
 
 def _ensure_check_as_json_string(val: Any) -> str:
@@ -82,50 +418,78 @@ def _ensure_check_as_json_string(val: Any) -> str:
         return ""
 
     if isinstance(val, (dict, list)):
-        return json.dumps(val, ensure_ascii=False, separators=(",", ":"))
+        return _COMPACT_JSON(val)
+
+    return _compact_json_text(str(val).strip())
+
+
+def _compact_json_text(s: str) -> str:
+    # 批量测试中 check 列常整列相同，短文本按文本缓存紧凑化结果；长文本直接计算
+    if len(s) <= _JSON_CACHE_MAX_LEN:
+        return _compact_json_text_cached(s)
+    return _compact_json_text_uncached(s)
 
-    s = str(val).strip()
-    if s.startswith("{") or s.startswith("["):
+
+def _compact_json_text_uncached(s: str) -> str:
+    if _looks_like_json(s):
         try:
             obj = json.loads(s)
-            return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+            return _COMPACT_JSON(obj)
         except Exception:
             return s
     return s
 
 
+_compact_json_text_cached = functools.lru_cache(maxsize=4096)(
+    _compact_json_text_uncached
+)
+
+
 def _pretty_json(val: Any) -> str:
     try:
-        return json.dumps(val, ensure_ascii=False, indent=2)
+        return _PRETTY_JSON(val)
     except Exception:
         return str(val)
 
 
-def _get_row_value(row: pd.Series, col: Any) -> Any:
-    """健壮地从行中取列值：
+def _stringify_output(val: Any, pretty: bool) -> str:
+    """输出字段转字符串：None -> ""；美化时整体按 JSON 缩进输出；
+    否则 dict/list 为紧凑 JSON，其余 str()。"""
+    if val is None:
+        return ""
+    if pretty:
+        return _pretty_json(val)
+    if isinstance(val, (dict, list)):
+        return _COMPACT_JSON(val)
+    return str(val)
+
+
+def _column_getter(columns: Iterable[Any], col: Any) -> Callable[[Dict[str, Any]], Any]:
+    """把配置里的列名解析为输入表的实际列名（整表只解析一次），返回 ``row -> 值``：
     - 优先精确匹配列名；
     - 其次尝试去除首尾空白后的列名；
     - 再次尝试不区分大小写 + 去空白匹配；
-    找不到则返回 None。
+    找不到则恒返回 None。
     """
-    if not isinstance(row, pd.Series):
-        return None
+    known = dict.fromkeys(columns)
     try:
         # 精确匹配
-        if col in row.index:
-            return row[col]
-        # 去空白匹配
-        col_s = str(col).strip()
-        if col_s in row.index:
-            return row[col_s]
-        # 不区分大小写 + 去空白
-        norm = {str(k).strip().lower(): k for k in row.index}
-        key = col_s.lower()
-        if key in norm:
-            return row[norm[key]]
+        if col in known:
+            key = col
+        else:
+            # 去空白匹配
+            col_s = str(col).strip()
+            if col_s in known:
+                key = col_s
+            else:
+                # 不区分大小写 + 去空白
+                norm = {str(k).strip().lower(): k for k in known}
+                if col_s.lower() not in norm:
+                    return lambda row: None
+                key = norm[col_s.lower()]
     except Exception:
-        return None
-    return None
+        return lambda row: None
+    return lambda row: row.get(key)
 
 
 @dataclass
@@ -162,6 +526,19 @@ def _mask_token(tok: str, head: int = 6, tail: int = 4) -> str:
     return t[:head] + "..." + t[-tail:]
 
 
+@functools.lru_cache(maxsize=8)
+def _auth_headers(token: str) -> Tuple[str, Dict[str, str]]:
+    """规范化 token 并构造请求头；每次运行 token 不变，只构造一次。
+    返回的 headers 在各行/线程间共享，只读使用。"""
+    # 规范化 token：兼容传入已含有前缀的情况（如 "Bearer xxx"）
+    raw_token = (token or "").strip()
+    if raw_token.lower().startswith("bearer "):
+        raw_token = raw_token[7:].strip()
+
+    headers = {"Authorization": f"Bearer {raw_token}", "Content-Type": "application/json"}
+    return raw_token, headers
+
+
 def _call_api(
     url: str,
     token: str,
@@ -171,13 +548,9 @@ def _call_api(
     response_mode: str,
     pretty: bool,
     debug: bool = False,
+    session: Optional[requests.Session] = None,
 ) -> RunResult:
-    # 规范化 token：兼容传入已含有前缀的情况（如 "Bearer xxx"）
-    raw_token = (token or "").strip()
-    if raw_token.lower().startswith("bearer "):
-        raw_token = raw_token[7:].strip()
-
-    headers = {"Authorization": f"Bearer {raw_token}", "Content-Type": "application/json"}
+    raw_token, headers = _auth_headers(token)
     payload = {
         "inputs": inputs_payload,
         "response_mode": response_mode or "blocking",
@@ -191,19 +564,26 @@ def _call_api(
         print(f"URL: {url}")
         print(f"Headers: {json.dumps(dbg_headers, ensure_ascii=False)}")
         print("Body:")
-        payload_pretty = json.dumps(payload, ensure_ascii=False, indent=2)
+        payload_pretty = _PRETTY_JSON(payload)
         print(payload_pretty)
         # 直接可用的 curl 命令（使用真实 Token）
         print("\n[DEBUG] cURL（可直接复制执行）:")
-        print(f"curl -X POST '{url}' \")
-        print(f"  -H 'Authorization: Bearer {raw_token}' \")
-        print("  -H 'Content-Type: application/json' \")
+        print(f"curl -X POST '{url}' \\")
+        print(f"  -H 'Authorization: Bearer {raw_token}' \\")
+        print("  -H 'Content-Type: application/json' \\")
         print("  --data-binary @- <<'JSON'")
         print(payload_pretty)
         print("JSON")
         return RunResult(status="debug", outputs_raw={})
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
+        body = _REQUEST_JSON(payload).encode("utf-8")
+    except (ValueError, TypeError) as e:
+        # 单行负载非法（如 NaN、不可序列化对象）只记为该行错误，不中断整批
+        return RunResult(error=f"Invalid request payload: {e}")
+    try:
+        # 复用 Session 以保持 keep-alive，避免每行重新建立 TCP/TLS 连接
+        post = session.post if session is not None else requests.post
+        resp = post(url, headers=headers, data=body, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
     except requests.exceptions.RequestException as e:
@@ -222,14 +602,16 @@ def _call_api(
         return RunResult(task_id=task_id, workflow_run_id=workflow_run_id, workflow_id=workflow_id, status=status, error=_pretty_json(err_msg))
 
     outputs = d.get("outputs") or {}
+    get = outputs.get
+    llm_out, llm_judge = get("llm_out"), get("llm_judge")
     if pretty:
-        _, llm_out_pretty = _try_parse_json_maybe_markdown(outputs.get("llm_out", ""))
-        llm_judge_obj, llm_judge_pretty = _try_parse_json_maybe_markdown(outputs.get("llm_judge", ""))
+        # 缺失键与 None 一样返回 (None, None)，写出/打印时均为空
+        _, llm_out_pretty = _try_parse_json_maybe_markdown(llm_out)
+        llm_judge_obj, llm_judge_pretty = _try_parse_json_maybe_markdown(llm_judge)
     else:
-        llm_out_pretty = "" if outputs.get("llm_out") is None else str(outputs.get("llm_out"))
-        lj = outputs.get("llm_judge")
-        llm_judge_pretty = "" if lj is None else (json.dumps(lj, ensure_ascii=False, separators=(",", ":")) if isinstance(lj, (dict, list)) else str(lj))
-        llm_judge_obj = lj if isinstance(lj, dict) else None
+        llm_out_pretty = "" if llm_out is None else str(llm_out)
+        llm_judge_pretty = _stringify_output(llm_judge, False)
+        llm_judge_obj = llm_judge if isinstance(llm_judge, dict) else None
 
     schema_ok = score = scores_val = diagnostics_val = None
     if isinstance(llm_judge_obj, dict):
@@ -250,33 +632,9 @@ def _call_api(
         status=status,
         llm_out=llm_out_pretty,
         llm_judge=llm_judge_pretty,
-        judge_usage=(
-            _pretty_json(outputs.get("judge_usage"))
-            if pretty and outputs.get("judge_usage") is not None
-            else (
-                json.dumps(outputs.get("judge_usage"), ensure_ascii=False, separators=(",", ":"))
-                if outputs.get("judge_usage") is not None and isinstance(outputs.get("judge_usage"), (dict, list))
-                else ("" if outputs.get("judge_usage") is None else str(outputs.get("judge_usage")))
-            )
-        ),
-        check_out=(
-            _pretty_json(outputs.get("check"))
-            if pretty and outputs.get("check") is not None
-            else (
-                json.dumps(outputs.get("check"), ensure_ascii=False, separators=(",", ":"))
-                if outputs.get("check") is not None and isinstance(outputs.get("check"), (dict, list))
-                else ("" if outputs.get("check") is None else str(outputs.get("check")))
-            )
-        ),
-        session=(
-            _pretty_json(outputs.get("session"))
-            if pretty and outputs.get("session") is not None
-            else (
-                json.dumps(outputs.get("session"), ensure_ascii=False, separators=(",", ":"))
-                if outputs.get("session") is not None and isinstance(outputs.get("session"), (dict, list))
-                else ("" if outputs.get("session") is None else str(outputs.get("session")))
-            )
-        ),
+        judge_usage=_stringify_output(get("judge_usage"), pretty),
+        check_out=_stringify_output(get("check"), pretty),
+        session=_stringify_output(get("session"), pretty),
         # ↓↓↓ 新增
         llm_judge_schema_ok=schema_ok_s,
         llm_judge_score=score_s,
@@ -286,6 +644,65 @@ def _call_api(
     )
 
 
+def _iter_api_results(
+    calls: Iterable[Tuple[Any, ...]], concurrency: int = 1
+) -> Iterator[RunResult]:
+    """按输入顺序逐个产出 _call_api(*args) 的结果，所有请求共用一个 Session。
+    - concurrency <= 1：逐行串行请求（与旧行为一致）；
+    - concurrency > 1：线程池并发请求，最多保持 2*concurrency 个在途任务，
+      结果仍按行顺序产出，便于调用方逐行落盘/续跑。
+    """
+    with requests.Session() as session:
+        # 默认连接池每主机仅 10 个连接；并发更高时放大，避免多余连接被丢弃重建
+        pool_size = max(concurrency, requests.adapters.DEFAULT_POOLSIZE)
+        # 仅重试建连失败（请求尚未发出）；工作流调用非幂等，读超时/5xx 不重试以免重复执行
+        retries = Retry(
+            total=None,
+            connect=3,
+            read=0,
+            redirect=0,
+            status=0,
+            other=0,
+            backoff_factor=0.3,
+        )
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=pool_size, max_retries=retries
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if concurrency <= 1:
+            for call_args in calls:
+                yield _call_api(*call_args, session=session)
+            return
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            pending: deque = deque()
+            for call_args in calls:
+                pending.append(pool.submit(_call_api, *call_args, session=session))
+                if len(pending) >= 2 * concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+# 无配置时的固定输出列顺序
+_FIXED_COLUMNS = [
+    "task_id",
+    "workflow_run_id",
+    "data.workflow_id",
+    "data.status",
+    "data.outputs.llm_out",
+    "data.outputs.llm_judge",
+    "data.outputs.judge_usage",
+    "data.outputs.check",
+    "data.outputs.session",
+    "error",
+    "llm_judge.schema_ok",
+    "llm_judge.score",
+    "llm_judge.scores",
+    "llm_judge.diagnostics",
+]
+
+
 def _tee_print(res: RunResult) -> None:
     mapping = [
         ("task_id", res.task_id),
@@ -314,9 +731,10 @@ def _load_json_config(path: Path) -> Dict[str, Any]:
     return json.loads(text)
 
 
-def _get_by_path(obj: Any, path: str) -> Any:
+def _get_by_path(obj: Any, parts: Tuple[str, ...]) -> Any:
+    """按预先拆分好的点号路径（键元组）取值，任一级缺失返回 None。"""
     cur = obj
-    for part in path.split("."):
+    for part in parts:
         if isinstance(cur, dict) and part in cur:
             cur = cur[part]
         else:
@@ -324,39 +742,87 @@ def _get_by_path(obj: Any, path: str) -> Any:
     return cur
 
 
+@dataclass(frozen=True)
+class _OutputSpec:
+    """预编译的输出列配置：路径在加载配置时拆分一次，逐行直接取值。"""
+
+    # (列名, 从根对象出发的路径键元组)
+    columns: Tuple[Tuple[str, Tuple[str, ...]], ...]
+    base_parts: Tuple[str, ...]
+    include_all: bool
+    # 在 base 下已通过 columns 明确映射的相对路径（避免 include_all 重复添加同一路径为列名）
+    mapped_under_base: frozenset
+
+
+def _compile_output_spec(conf: Dict[str, Any]) -> _OutputSpec:
+    base = conf.get("base") or "data.outputs"
+    base_parts = tuple(base.split("."))
+    columns: List[Tuple[str, Tuple[str, ...]]] = []
+    mapped_under_base = set()
+    for col in conf.get("columns") or []:
+        name = col.get("name")
+        path = col.get("path")
+        if not name or not path:
+            continue
+        if path.startswith("$."):
+            columns.append((name, tuple(path[2:].split("."))))
+        else:
+            columns.append((name, base_parts + tuple(path.split("."))))
+            # 仅记录 base 下的相对路径 key（与 include_all 的扁平 key 一致）
+            mapped_under_base.add(path)
+    return _OutputSpec(
+        columns=tuple(columns),
+        base_parts=base_parts,
+        include_all=bool(conf.get("include_all", False)),
+        mapped_under_base=frozenset(mapped_under_base),
+    )
+
+
 def _flatten_dict(d: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    # 显式栈代替递归：栈中保存 (前缀, 未遍历完的 items 迭代器)，
+    # 遇到子 dict 时压栈深入，保持与递归版本相同的键顺序
     out: Dict[str, Any] = {}
-    for k, v in (d or {}).items():
-        key = f"{prefix}.{k}" if prefix else k
-        if isinstance(v, dict):
-            out.update(_flatten_dict(v, key))
-        else:
+    stack = [(prefix, iter((d or {}).items()))]
+    while stack:
+        p, items = stack[-1]
+        for k, v in items:
+            key = f"{p}.{k}" if p else k
+            if isinstance(v, dict):
+                stack.append((key, iter(v.items())))
+                break
             out[key] = v
+        else:
+            stack.pop()
     return out
 
 
+_ESCAPE_RE = re.compile(r'\\[ntr"\\]')
+_UNESCAPES = {"\\n": "\n", "\\t": "\t", "\\r": "\r", '\\"': '"', "\\\\": "\\"}
+
+
+def _unescape_match(m: "re.Match[str]") -> str:
+    return _UNESCAPES[m.group(0)]
+
+
 def _render_value(val: Any, pretty: bool) -> str:
     if val is None:
         return ""
     if isinstance(val, (dict, list)):
-        return json.dumps(val, ensure_ascii=False, indent=2) if pretty else json.dumps(val, ensure_ascii=False, separators=(",", ":"))
+        return _PRETTY_JSON(val) if pretty else _COMPACT_JSON(val)
     s = str(val)
     if not pretty:
         return s
     # 尝试将 JSON 字符串美化
-    try:
-        if (s.startswith("{") and s.endswith("}")) or (s.startswith("[") and s.endswith("]")):
-            obj = json.loads(s)
-            return json.dumps(obj, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-    # 处理常见转义序列
-    s = s.replace("\\n", "\n").replace("\\t", "\t").replace("\\r", "\r").replace("\\\"", '"').replace("\\\\", "\\")
-    return s
+    if _looks_like_json(s):
+        ok, _, pretty_s = _parse_json_pretty(s)
+        if ok:
+            return pretty_s
+    # 处理常见转义序列：单次扫描，转义的反斜杠不会与其后的字符再次组合
+    return _ESCAPE_RE.sub(_unescape_match, s)
 
 
-def _resolve_value_from_spec(spec: Any, row: pd.Series) -> Any:
-    """根据 spec 与行记录解析一个值。
+def _compile_spec(spec: Any, columns: Iterable[Any]) -> Callable[[Dict[str, Any]], Any]:
+    """把一个 spec 预编译为 ``row -> 值`` 的函数（spec 的分支判断与列名解析只做一次）。
     支持：
     - 字符串：视为列名，返回对应单元格值（优先保持原始 dict/list），否则字符串
     - 对象：
@@ -365,100 +831,202 @@ def _resolve_value_from_spec(spec: Any, row: pd.Series) -> Any:
     """
     if isinstance(spec, dict):
         if "const" in spec:
-            return spec.get("const")
-        if "from" in spec:
-            col = spec["from"]
-            val = _get_row_value(row, col)
-            if _is_nan(val):
-                return spec.get("default", "")
-            cast = spec.get("as")
-            if cast == "json":
+            const = spec.get("const")
+            return lambda row: const
+        if "from" not in spec:
+            return lambda row: None
+        get_col = _column_getter(columns, spec["from"])
+        cast = spec.get("as")
+        default = spec.get("default", "")
+
+        if cast == "json":
+            has_default = "default" in spec
+
+            def resolve_json(row: Dict[str, Any]) -> Any:
+                val = get_col(row)
+                if _is_nan(val):
+                    return default
                 if isinstance(val, (dict, list)):
                     return val
                 s = str(val).strip()
                 try:
                     return json.loads(s)
                 except Exception:
-                    return spec.get("default", s)
-            if cast == "json_string":
+                    return default if has_default else s
+
+            return resolve_json
+
+        if cast == "json_string":
+
+            def resolve_json_string(row: Dict[str, Any]) -> Any:
+                val = get_col(row)
+                if _is_nan(val):
+                    return default
                 vs = _ensure_check_as_json_string(val)
-                return spec.get("default", "") if vs == "" else vs
-            # 默认 string
+                return default if vs == "" else vs
+
+            return resolve_json_string
+
+        # 默认 string；未指定 as 时 dict/list 保留结构
+        def resolve_string(row: Dict[str, Any]) -> Any:
+            val = get_col(row)
+            if _is_nan(val):
+                return default
             if isinstance(val, (dict, list)):
-                # 未指定 as 时，保留结构
                 return val
-            s = "" if val is None else str(val)
-            return spec.get("default", "") if s == "" else s
-        return None
+            s = str(val)
+            return default if s == "" else s
+
+        return resolve_string
     # 字符串列名
     if isinstance(spec, str):
-        val = _get_row_value(row, spec)
-        if _is_nan(val):
-            return ""
-        return val if isinstance(val, (dict, list)) else str(val)
-    return spec
+        get_spec_col = _column_getter(columns, spec)
+
+        def resolve_column(row: Dict[str, Any]) -> Any:
+            val = get_spec_col(row)
+            if _is_nan(val):
+                return ""
+            return val if isinstance(val, (dict, list)) else str(val)
+
+        return resolve_column
+    return lambda row: spec
+
+
+RequestBuilder = Callable[[Dict[str, Any]], Tuple[Dict[str, Any], str, str]]
 
 
-def _build_request_from_config(
-    row: pd.Series,
+def _compile_request_builder(
     args: argparse.Namespace,
     conf: Optional[Dict[str, Any]],
-) -> Tuple[Dict[str, Any], str, str]:
-    """从配置或参数构造 Dify 请求体中的 inputs 与 user、response_mode。
-    返回: (inputs_payload, user_val, response_mode)
+    columns: Iterable[Any],
+) -> RequestBuilder:
+    """按配置或参数预编译请求构造函数：
+    ``row -> (inputs_payload, user_val, response_mode)``。
+    配置中的 spec 只解析一次，逐行仅做取值。
     """
-    response_mode = "blocking"
     # 无配置：按旧逻辑
     if not conf or not isinstance(conf.get("request"), dict):
-        input_text = "" if _is_nan(row.get(args.input_col)) else str(row.get(args.input_col))
-        check_str = _ensure_check_as_json_string(row.get(args.check_col))
-        user_val = "cli-runner"
-        if args.user_col in row and not _is_nan(row.get(args.user_col)):
-            user_val = str(row.get(args.user_col))
-        return {"input": input_text, "check": check_str}, user_val, response_mode
+
+        def build_default(row: Dict[str, Any]) -> Tuple[Dict[str, Any], str, str]:
+            input_val = row.get(args.input_col)
+            input_text = "" if _is_nan(input_val) else str(input_val)
+            check_str = _ensure_check_as_json_string(row.get(args.check_col))
+            user_val = "cli-runner"
+            if args.user_col in row and not _is_nan(row.get(args.user_col)):
+                user_val = str(row.get(args.user_col))
+            return {"input": input_text, "check": check_str}, user_val, "blocking"
+
+        return build_default
 
     req = conf["request"]
-    inputs_payload: Dict[str, Any] = {}
 
     # inputs 映射
     inputs_map = req.get("inputs", {})
+    input_fns: List[Tuple[str, Callable[[Dict[str, Any]], Any]]] = []
     if isinstance(inputs_map, dict):
-        for name, spec in inputs_map.items():
-            inputs_payload[name] = _resolve_value_from_spec(spec, row)
+        input_fns = [(name, _compile_spec(spec, columns)) for name, spec in inputs_map.items()]
 
-    # user
+    # user：未配置时退回到参数列；支持 {from/const} 或列名
     user_spec = req.get("user")
-    if user_spec is None:
-        # 退回到参数列
-        if args.user_col in row and not _is_nan(row.get(args.user_col)):
-            user_val = str(row.get(args.user_col))
-        else:
-            user_val = "cli-runner"
-    else:
-        # 支持 {from/const}
-        if isinstance(user_spec, dict) or isinstance(user_spec, str):
-            v = _resolve_value_from_spec(user_spec, row)
-            user_val = "cli-runner" if v in (None, "") else str(v)
-        else:
-            user_val = "cli-runner"
+    user_fn: Optional[Callable[[Dict[str, Any]], Any]] = None
+    if isinstance(user_spec, (dict, str)):
+        user_fn = _compile_spec(user_spec, columns)
+
+    def resolve_user(row: Dict[str, Any]) -> str:
+        if user_fn is not None:
+            v = user_fn(row)
+            return "cli-runner" if v in (None, "") else str(v)
+        if (
+            user_spec is None
+            and args.user_col in row
+            and not _is_nan(row.get(args.user_col))
+        ):
+            return str(row.get(args.user_col))
+        return "cli-runner"
 
     # response_mode 可选
     rm_spec = req.get("response_mode")
-    if rm_spec is not None:
-        if isinstance(rm_spec, dict) or isinstance(rm_spec, str):
-            v = _resolve_value_from_spec(rm_spec, row)
+    rm_fn: Optional[Callable[[Dict[str, Any]], Any]] = None
+    fixed_mode = "blocking"
+    if isinstance(rm_spec, (dict, str)):
+        rm_fn = _compile_spec(rm_spec, columns)
+    elif isinstance(rm_spec, bool):
+        fixed_mode = "streaming" if rm_spec else "blocking"
+
+    def build(row: Dict[str, Any]) -> Tuple[Dict[str, Any], str, str]:
+        inputs_payload = {name: fn(row) for name, fn in input_fns}
+        response_mode = fixed_mode
+        if rm_fn is not None:
+            v = rm_fn(row)
             if isinstance(v, str) and v:
                 response_mode = v
-        elif isinstance(rm_spec, bool):
-            response_mode = "streaming" if rm_spec else "blocking"
+        return inputs_payload, resolve_user(row), response_mode
+
+    return build
+
+
+def _config_row(res: RunResult, out_spec: _OutputSpec, pretty: bool) -> Dict[str, Any]:
+    """按预编译的输出配置把一次调用结果展开为一行输出。"""
+    # 组合一个根对象，便于路径解析
+    root_obj: Dict[str, Any] = {
+        "task_id": res.task_id,
+        "workflow_run_id": res.workflow_run_id,
+        "data": {
+            "workflow_id": res.workflow_id,
+            "status": res.status,
+            "outputs": res.outputs_raw or {},
+        },
+        "error": res.error,
+    }
 
-    return inputs_payload, user_val, response_mode
+    row_out: Dict[str, Any] = {
+        "task_id": res.task_id or "",
+        "workflow_run_id": res.workflow_run_id or "",
+        "data.workflow_id": res.workflow_id or "",
+        "data.status": res.status or "",
+        "error": res.error or "",
+    }
+
+    # 配置列
+    for name, parts in out_spec.columns:
+        row_out[name] = _render_value(_get_by_path(root_obj, parts), pretty)
+
+    # 自动展开 outputs
+    if out_spec.include_all:
+        base_obj = _get_by_path(root_obj, out_spec.base_parts)
+        if isinstance(base_obj, dict):
+            flat = _flatten_dict(base_obj)
+            for k, v in flat.items():
+                # 不覆盖已配置列；且跳过已通过 columns 指定过的 base 相对路径
+                if k not in row_out and k not in out_spec.mapped_under_base:
+                    row_out[k] = _render_value(v, pretty)
+    return row_out
+
+
+def _fixed_row(res: RunResult) -> Dict[str, Any]:
+    """无配置时的固定列输出行（列顺序同 _FIXED_COLUMNS）。"""
+    return {
+        "task_id": res.task_id or "",
+        "workflow_run_id": res.workflow_run_id or "",
+        "data.workflow_id": res.workflow_id or "",
+        "data.status": res.status or "",
+        "data.outputs.llm_out": res.llm_out or "",
+        "data.outputs.llm_judge": res.llm_judge or "",
+        "data.outputs.judge_usage": res.judge_usage or "",
+        "data.outputs.check": res.check_out or "",
+        "data.outputs.session": res.session or "",
+        "error": res.error or "",
+        "llm_judge.schema_ok": res.llm_judge_schema_ok or "",
+        "llm_judge.score": res.llm_judge_score or "",
+        "llm_judge.scores": res.llm_judge_scores or "",
+        "llm_judge.diagnostics": res.llm_judge_diagnostics or "",
+    }
 
 
 def main(argv: Optional[list[str]] = None) -> None:
     ap = argparse.ArgumentParser(description="批量运行工作流并导出结果（Excel/CSV）")
     ap.add_argument("-i", "--in", dest="inp", required=True, help="输入 Excel/CSV 路径")
-    ap.add_argument("-o", "--out", dest="outp", required=True, help="输出 Excel/CSV 路径（扩展名决定格式）")
+    ap.add_argument("-o", "--out", dest="outp", required=True, help="输出 .xlsx/.csv 路径（扩展名决定格式）")
     ap.add_argument("--url", default="http://localhost/v1/workflows/run", help="接口地址")
     ap.add_argument("--token", required=True, help="Bearer Token（如 app-xxxxxx）")
     ap.add_argument("--input-col", default="input", help="输入文本列名（默认 input）")
@@ -471,13 +1039,39 @@ def main(argv: Optional[list[str]] = None) -> None:
     ap.add_argument("--pretty", type=int, default=1, help="是否美化输出（1=是，0=否）")
     ap.add_argument("--debug", type=int, default=0, help="调试模式：仅打印将发送的 Dify 请求，不实际调用，且忽略 -o 文件写入（1 开启）")
     ap.add_argument("--row", type=int, default=0, help="调试模式下指定行号（从 1 开始，仅处理该行）")
-    ap.add_argument("--fast-append", type=int, default=0, help="容错与长批量优化：检测已存在的输出并跳过已处理行；CSV 采用逐行追加，Excel 采用合并重写（1 开启）")
+    ap.add_argument(
+        "--fast-append",
+        type=int,
+        default=0,
+        help=(
+            "容错与长批量优化：检测已存在的输出并跳过已处理行；"
+            "CSV 采用逐行追加，Excel 每 --flush-every 行原子重写（1 开启）"
+        ),
+    )
+    ap.add_argument(
+        "--flush-every",
+        type=int,
+        default=50,
+        help=(
+            "每 N 行落盘一次（默认 50；结束或中断时也会落盘；"
+            "fast-append 的 CSV 仍逐行落盘）"
+        ),
+    )
+    ap.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="并发请求数（默认 1=逐行串行；结果仍按行顺序写出）",
+    )
 
     args = ap.parse_args(argv)
 
     in_path = Path(args.inp).expanduser().resolve()
     out_path = Path(args.outp).expanduser().resolve()
-    df = _read_table(in_path)
+    # Debug 模式不写出，其余情况在读取输入/发起请求前先校验输出格式
+    if not args.debug:
+        _check_output_path(out_path)
+    in_columns, in_rows = _read_input_rows(in_path)
 
     conf: Optional[Dict[str, Any]] = None
     if args.config:
@@ -486,12 +1080,12 @@ def main(argv: Optional[list[str]] = None) -> None:
     # 列检查：若未提供 request 配置，使用旧的固定列检查
     if not (conf and isinstance(conf.get("request"), dict)):
         for col in [args.input_col, args.check_col]:
-            if col not in df.columns:
+            if col not in in_columns:
                 raise KeyError(f"输入表缺少必须列: {col}")
-    # user 列是否存在仅用于无配置时的回退逻辑，此处保留检查在 _build_request_from_config 内部完成
+    # user 列是否存在仅用于无配置时的回退逻辑，
+    # 此处保留检查在 _compile_request_builder 内部完成
 
-    results: List[Dict[str, Any]] = []
-    total = len(df)
+    total = len(in_rows)
     limit = total if args.max_rows <= 0 else min(args.max_rows, total)
 
     use_fast = bool(args.fast_append)
@@ -500,19 +1094,17 @@ def main(argv: Optional[list[str]] = None) -> None:
     # fast-append 模式的断点续跑准备
     processed_count = 0
     out_columns: Optional[List[str]] = None
-    prev_out_df: Optional[pd.DataFrame] = None
-    warned_extra_cols = False
+    prev_rows: List[List[Any]] = []
     if use_fast and not debug_mode:
         if out_path.exists():
             try:
-                prev_out_df = _read_table(out_path)
-                processed_count = len(prev_out_df)
-                out_columns = list(prev_out_df.columns)
+                out_columns, prev_rows = _read_existing_output(out_path)
+                processed_count = len(prev_rows)
                 if processed_count > 0:
                     print(f"↻ 检测到已存在输出，跳过前 {processed_count} 行并续跑……")
             except Exception as e:
                 print(f"⚠️ fast-append 读取既有输出失败，将从头开始：{e}")
-                prev_out_df = None
+                prev_rows = []
                 processed_count = 0
                 out_columns = None
 
@@ -534,171 +1126,50 @@ def main(argv: Optional[list[str]] = None) -> None:
             print(f"✅ 已完成：现有输出包含 {processed_count} 行（>= 目标 {limit} 行），无需继续。")
         return
 
-    for idx in range(start_idx, limit):
-        row = df.iloc[idx]
-        inputs_payload, user_val, response_mode = _build_request_from_config(row, args, conf)
-
-        # 将 response_mode 注入 _call_api 的 payload（通过 payload 默认 blocking；此处覆盖 headers/inputs）
-        # 为避免修改 _call_api 签名过多，这里复用 _call_api 并在其内使用默认 blocking，后续如需 streaming 可扩展。
-        # 目前兼容：若配置中指定了非 blocking，仅通过 payload.response_mode 传递即可。
-
-        res = _call_api(
-            args.url,
-            args.token,
-            inputs_payload,
-            user_val,
-            args.timeout,
-            response_mode,
-            bool(args.pretty),
-            bool(args.debug),
+    build_request = _compile_request_builder(args, conf, in_columns)
+    out_spec = _compile_output_spec(conf) if conf else None
+
+    def _calls() -> Iterator[Tuple[Any, ...]]:
+        for row in in_rows[start_idx:limit]:
+            inputs_payload, user_val, response_mode = build_request(row)
+            # response_mode 通过 payload.response_mode 传递（默认 blocking）
+            yield (
+                args.url,
+                args.token,
+                inputs_payload,
+                user_val,
+                args.timeout,
+                response_mode,
+                bool(args.pretty),
+                bool(args.debug),
+            )
+
+    # Debug 模式仅一行且只打印请求，无需并发
+    concurrency = 1 if debug_mode else args.concurrency
+    # 写出器：fast-append 续写既有输出；常规路径流式逐行写出（固定列模式表头已知）
+    writer: Optional[Any] = None
+    if use_fast and not debug_mode:
+        writer = _AppendTableWriter(out_path, out_columns, prev_rows, args.flush_every)
+    elif not debug_mode:
+        writer = _StreamingTableWriter(
+            out_path, None if conf else _FIXED_COLUMNS, args.flush_every
         )
-        if args.tee == 1:
-            _tee_print(res)
-        if conf:
-            # 组合一个根对象，便于路径解析
-            root_obj: Dict[str, Any] = {
-                "task_id": res.task_id,
-                "workflow_run_id": res.workflow_run_id,
-                "data": {
-                    "workflow_id": res.workflow_id,
-                    "status": res.status,
-                    "outputs": res.outputs_raw or {},
-                },
-                "error": res.error,
-            }
-
-            base = conf.get("base") or "data.outputs"
-            include_all = bool(conf.get("include_all", False))
-            cols_cfg = conf.get("columns") or []
-            # 记录在 base 下已通过 columns 明确映射的相对路径（避免 include_all 重复添加同一路径为列名）
-            mapped_under_base: set[str] = set()
-
-            row_out: Dict[str, Any] = {
-                "task_id": res.task_id or "",
-                "workflow_run_id": res.workflow_run_id or "",
-                "data.workflow_id": res.workflow_id or "",
-                "data.status": res.status or "",
-                "error": res.error or "",
-            }
-
-            # 配置列
-            for col in cols_cfg:
-                name = col.get("name")
-                path = col.get("path")
-                if not name or not path:
-                    continue
-                if path.startswith("$."):
-                    v = _get_by_path(root_obj, path[2:])
-                else:
-                    rel = path if base == "" else f"{base}.{path}"
-                    v = _get_by_path(root_obj, rel)
-                    # 仅记录 base 下的相对路径 key（与 include_all 的扁平 key 一致）
-                    mapped_under_base.add(path)
-                row_out[name] = _render_value(v, bool(args.pretty))
-
-            # 自动展开 outputs
-            if include_all:
-                base_obj = _get_by_path(root_obj, base)
-                if isinstance(base_obj, dict):
-                    flat = _flatten_dict(base_obj)
-                    for k, v in flat.items():
-                        # 不覆盖已配置列；且跳过已通过 columns 指定过的 base 相对路径
-                        if k not in row_out and k not in mapped_under_base:
-                            row_out[k] = _render_value(v, bool(args.pretty))
-
-            if use_fast and not debug_mode:
-                suf = out_path.suffix.lower()
-                # 确定输出列：优先沿用既有文件列；否则以当前行的键顺序为列
-                if out_columns is None:
-                    out_columns = list(row_out.keys())
-
-                # 处理潜在的“新列”（include_all 导致的动态列）
-                if not warned_extra_cols:
-                    extra = [k for k in row_out.keys() if k not in out_columns]
-                    if extra:
-                        print(f"⚠️ fast-append: 检测到未在表头中的新列，将被忽略：{', '.join(extra)}")
-                        warned_extra_cols = True
-
-                row_df = pd.DataFrame([{k: row_out.get(k, "") for k in out_columns}], columns=out_columns)
-                if suf == ".csv":
-                    # CSV：逐行追加（首行写表头）
-                    mode = "a" if processed_count > 0 else "w"
-                    header = False if processed_count > 0 else True
-                    row_df.to_csv(out_path, mode=mode, header=header, index=False)
-                    processed_count += 1
-                else:
-                    # Excel：合并既有数据并重写（保持容错与正确性）。
-                    if prev_out_df is None:
-                        prev_out_df = pd.DataFrame(columns=out_columns)
-                    prev_out_df = pd.concat([prev_out_df, row_df], ignore_index=True)
-                    _write_table(prev_out_df, out_path)
-                    processed_count += 1
-            else:
-                results.append(row_out)
-                # 增量写出：根据“当前已收集的结果”生成 DataFrame 并落盘
-                if not debug_mode:
-                    all_keys: List[str] = []
-                    for r in results:
-                        for k in r.keys():
-                            if k not in all_keys:
-                                all_keys.append(k)
-                    _write_table(pd.DataFrame(results, columns=all_keys), out_path)
-        else:
-            # 兼容原有固定列
-            row_fixed = {
-                "task_id": res.task_id or "",
-                "workflow_run_id": res.workflow_run_id or "",
-                "data.workflow_id": res.workflow_id or "",
-                "data.status": res.status or "",
-                "data.outputs.llm_out": res.llm_out or "",
-                "data.outputs.llm_judge": res.llm_judge or "",
-                "data.outputs.judge_usage": res.judge_usage or "",
-                "data.outputs.check": res.check_out or "",
-                "data.outputs.session": res.session or "",
-                "error": res.error or "",
-                "llm_judge.schema_ok": res.llm_judge_schema_ok or "",
-                "llm_judge.score": res.llm_judge_score or "",
-                "llm_judge.scores": res.llm_judge_scores or "",
-                "llm_judge.diagnostics": res.llm_judge_diagnostics or "",
-            }
-            # 增量写出：固定列顺序
-            fixed_cols = [
-                "task_id",
-                "workflow_run_id",
-                "data.workflow_id",
-                "data.status",
-                "data.outputs.llm_out",
-                "data.outputs.llm_judge",
-                "data.outputs.judge_usage",
-                "data.outputs.check",
-                "data.outputs.session",
-                "error",
-                "llm_judge.schema_ok",
-                "llm_judge.score",
-                "llm_judge.scores",
-                "llm_judge.diagnostics",
-            ]
-            if use_fast and not debug_mode:
-                suf = out_path.suffix.lower()
-                # 既有列沿用；若不存在则使用固定列
-                if out_columns is None:
-                    out_columns = list(fixed_cols)
-                row_df = pd.DataFrame([{k: row_fixed.get(k, "") for k in out_columns}], columns=out_columns)
-                if suf == ".csv":
-                    mode = "a" if processed_count > 0 else "w"
-                    header = False if processed_count > 0 else True
-                    row_df.to_csv(out_path, mode=mode, header=header, index=False)
-                    processed_count += 1
-                else:
-                    if prev_out_df is None:
-                        prev_out_df = pd.DataFrame(columns=out_columns)
-                    prev_out_df = pd.concat([prev_out_df, row_df], ignore_index=True)
-                    _write_table(prev_out_df, out_path)
-                    processed_count += 1
+
+    try:
+        for res in _iter_api_results(_calls(), concurrency):
+            if args.tee == 1:
+                _tee_print(res)
+            if out_spec is not None:
+                row_out = _config_row(res, out_spec, bool(args.pretty))
             else:
-                results.append(row_fixed)
-                if not debug_mode:
-                    _write_table(pd.DataFrame(results, columns=fixed_cols), out_path)
+                # 兼容原有固定列
+                row_out = _fixed_row(res)
+            if writer is not None:
+                writer.write_row(row_out)
+    finally:
+        # 异常/中断时也把已缓冲的结果落盘
+        if writer is not None:
+            writer.close()
 
     # 调试模式：不写入输出文件，直接返回
     if debug_mode:
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+HEADER = ["原始记录", "计分", "原始记录-问题", "问题的积分", "标准回答", "猜测回答"]
+
+
+def _save_rows(path: Path, rows) -> Path:
+    # write_only streams rows straight to the sheet XML; the CLI reads the
+    # active sheet, so no title is needed.
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    wb.save(str(path))
+    return path
+
+
+# Input workbooks are only read by the CLI, so one copy per session is shared
+# by every test. Outputs are named after the input file ("sample", ...), and go
+# to each test's own cwd.
+@pytest.fixture(scope="session")
+def sample_xlsx(tmp_path_factory) -> Path:
+    rows = [
+        ["记录A", 1, "问题A", 5, "标准答A", "猜测答A"],
+        ["记录B", 2, "问题B", 8, "标准答B", "猜测答B"],
+        ["记录C", 3, "问题C", 2, "标准答C", "猜测答C"],
+    ]
+    return _save_rows(tmp_path_factory.mktemp("inputs") / "sample.xlsx", rows)
+
+
+@pytest.fixture(scope="session")
+def sample_many_xlsx(tmp_path_factory) -> Path:
+    rows = (
+        [f"记录{i}", i % 5, f"问题{i}", (i * 3) % 10, f"标准答{i}", f"猜测答{i}"]
+        for i in range(1, 17)
+    )
+    return _save_rows(tmp_path_factory.mktemp("inputs") / "sample_many.xlsx", rows)
+
+
+@pytest.fixture(scope="session")
+def example_cfg_path() -> Path:
+    # The repo's example config; load_config caches its parse by content.
+    return REPO_ROOT / "scripts" / "example_config.conf"
@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+from src.excel_transformer.config import (
+    _parse_multiple_json_objects,
+    _strip_json_comments,
+    load_config,
+)
+
+
+def _write_config(path: Path, content: str) -> None:
+    path.write_text(content, encoding="utf-8")
+
+
+def test_strip_comments_and_trailing_commas():
+    text = """
+    {
+      "a": 1, // first
+      "b": [1, 2, ,], // list
+      "c": {"d": 3,  // nested
+      },
+    }
+    """
+    cleaned = _strip_json_comments(text)
+    assert "//" not in cleaned
+    assert json.loads(cleaned) == {"a": 1, "b": [1, 2], "c": {"d": 3}}
+
+
+def test_strip_comments_keeps_string_contents():
+    text = '{"url": "http://example.com/x", "s": "a,}", "q": "say \\"//hi\\""} // c'
+    assert json.loads(_strip_json_comments(text)) == {
+        "url": "http://example.com/x",
+        "s": "a,}",
+        "q": 'say "//hi"',
+    }
+
+
+def test_load_config_with_comments_and_labels(tmp_path: Path):
+    cfg_text = """
+    [map]
+    {
+      "原始记录": "record", // 记录
+      "链接": "link",
+    }
+
+    [out]
+    输入区:
+    { "原始记录": "record", "url": "http://x//y", }
+    { '__label__': 'py', 'k': 'link' }
+    """
+    cfg_path = tmp_path / "cfg.conf"
+    _write_config(cfg_path, cfg_text)
+
+    cfg = load_config(str(cfg_path))
+    assert cfg.display_to_internal == {"原始记录": "record", "链接": "link"}
+    assert cfg.out_groups == [
+        {"原始记录": "record", "url": "http://x//y", "__label__": "输入区"},
+        {"__label__": "py", "k": "link"},
+    ]
+
+
+def test_load_config_cache_is_keyed_by_content(tmp_path: Path):
+    text = '[map]\n{"a": "x"}\n[out]\n{"a": "x"}\n'
+    p1, p2 = tmp_path / "one.conf", tmp_path / "two.conf"
+    _write_config(p1, text)
+    _write_config(p2, text)
+    cfg = load_config(str(p1))
+    assert load_config(str(p2)) == cfg
+
+    _write_config(p1, text.replace('"x"}\n[out]', '"y"}\n[out]'))
+    assert load_config(str(p1)).display_to_internal == {"a": "y"}
+
+
+def test_load_config_cache_hit_is_not_aliased(tmp_path: Path):
+    cfg_path = tmp_path / "cfg.conf"
+    _write_config(cfg_path, '[map]\n{"a": "x"}\n[out]\n{"k": {"v": "x"}}\n')
+    first = load_config(str(cfg_path))
+    first.display_to_internal["b"] = "y"
+    first.out_groups[0]["k"]["v"] = "changed"
+    first.out_groups.append({})
+
+    again = load_config(str(cfg_path))
+    assert again is not first
+    assert again.display_to_internal == {"a": "x"}
+    assert again.out_groups == [{"k": {"v": "x"}}]
+
+
+def test_parse_multiple_objects_mixed_quotes_and_braces_in_strings():
+    blob = """
+    A: {"k": "x}{y", "n": {"m": 1}}
+    B:
+    {'k': 'it\\'s {here}'}
+    {"k": "no label"}
+    """
+    assert _parse_multiple_json_objects(blob) == [
+        {"k": "x}{y", "n": {"m": 1}, "__label__": "A"},
+        {"k": "it's {here}", "__label__": "B"},
+        {"k": "no label"},
+    ]
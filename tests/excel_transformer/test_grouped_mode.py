@@ -1,23 +1,65 @@
 import csv
 import json
-import sys
 from pathlib import Path
 
+import pytest
 
-# Ensure repo root is on sys.path so `import src.excel_transformer.cli` works
-REPO_ROOT = Path(__file__).resolve().parents[2]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
+from src.excel_transformer.cli import main as cli_main
+from src.excel_transformer.config import load_config
+from src.excel_transformer.transform import transform_rows
 
-from src.excel_transformer.cli import main as cli_main  # noqa: E402
-from src.excel_transformer.config import load_config  # noqa: E402
-from src.excel_transformer.transform import transform_rows  # noqa: E402
+REPO_ROOT = Path(__file__).resolve().parents[2]
 
 
 def _write_config(path: Path, content: str) -> None:
     path.write_text(content, encoding="utf-8")
 
 
+def _read_xlsx_rows(path: Path) -> list:
+    """All rows of the active sheet as value tuples (read-only load)."""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return list(wb.active.iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+# Labelled three-group config shared by the grouped CSV/XLSX tests
+GROUPED_CFG_TEXT = """
+[map]
+{
+  "原始记录": "record",
+  "计分": "score",
+  "原始记录-问题": "ask",
+  "问题的积分": "ask_score",
+  "标准回答": "answer-1",
+  "猜测回答": "answer-2"
+}
+
+[out]
+{ "__label__": "input", "原始记录": "record", "计分": "score" }
+{ "__label__": "check", "原始记录-问题": "ask", "问题的积分": "ask_score" }
+{
+  "__label__": "answer",
+  "原始记录": "record",
+  "回答": {
+    "name": "answer",
+    "value": "answer-1",
+    "ex": { "if": "score==2", "value": "answer-2" }
+  }
+}
+"""
+
+
+@pytest.fixture(scope="module")
+def grouped_cfg_path(tmp_path_factory) -> Path:
+    cfg_path = tmp_path_factory.mktemp("cfg") / "cfg.conf"
+    _write_config(cfg_path, GROUPED_CFG_TEXT)
+    return cfg_path
+
+
 def test_grouped_csv_default_labels(tmp_path, monkeypatch):
     # Use provided sample workbook
     excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
@@ -68,29 +110,10 @@ def test_grouped_csv_default_labels(tmp_path, monkeypatch):
     assert g3 == {"原始记录": "记录A", "回答": "标准答A"}
 
 
-def test_grouped_csv_custom_labels(tmp_path, monkeypatch):
+def test_grouped_csv_custom_labels(grouped_cfg_path, tmp_path, monkeypatch):
     excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
 
-    cfg_text = (
-        """
-        [map]
-        {
-          "原始记录": "record",
-          "计分": "score",
-          "原始记录-问题": "ask",
-          "问题的积分": "ask_score",
-          "标准回答": "answer-1",
-          "猜测回答": "answer-2"
-        }
-
-        [out]
-        { "__label__": "input", "原始记录": "record", "计分": "score" }
-        { "__label__": "check", "原始记录-问题": "ask", "问题的积分": "ask_score" }
-        { "__label__": "answer", "原始记录": "record", "回答": { "name": "answer", "value": "answer-1", "ex": { "if": "score==2", "value": "answer-2" } } }
-        """
-    )
-    cfg_path = tmp_path / "cfg.conf"
-    _write_config(cfg_path, cfg_text)
+    cfg_path = grouped_cfg_path
 
     monkeypatch.chdir(tmp_path)
 
@@ -116,29 +139,10 @@ def test_grouped_csv_custom_labels(tmp_path, monkeypatch):
     assert g3 == {"原始记录": "记录A", "回答": "标准答A"}
 
 
-def test_grouped_xlsx_custom_labels(tmp_path, monkeypatch):
+def test_grouped_xlsx_custom_labels(grouped_cfg_path, tmp_path, monkeypatch):
     excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
 
-    cfg_text = (
-        """
-        [map]
-        {
-          "原始记录": "record",
-          "计分": "score",
-          "原始记录-问题": "ask",
-          "问题的积分": "ask_score",
-          "标准回答": "answer-1",
-          "猜测回答": "answer-2"
-        }
-
-        [out]
-        { "__label__": "input", "原始记录": "record", "计分": "score" }
-        { "__label__": "check", "原始记录-问题": "ask", "问题的积分": "ask_score" }
-        { "__label__": "answer", "原始记录": "record", "回答": { "name": "answer", "value": "answer-1", "ex": { "if": "score==2", "value": "answer-2" } } }
-        """
-    )
-    cfg_path = tmp_path / "cfg.conf"
-    _write_config(cfg_path, cfg_text)
+    cfg_path = grouped_cfg_path
 
     monkeypatch.chdir(tmp_path)
 
@@ -148,14 +152,11 @@ def test_grouped_xlsx_custom_labels(tmp_path, monkeypatch):
     out_xlsx = tmp_path / "output" / "sample.xlsx"
     assert out_xlsx.exists()
 
-    import openpyxl
-
-    wb = openpyxl.load_workbook(out_xlsx)
-    ws = wb.active
-    headers = [c.value for c in ws[1]]
+    rows = _read_xlsx_rows(out_xlsx)
+    headers = list(rows[0])
     assert headers == ["input", "check", "answer"]
 
-    row = [c.value for c in ws[2]]
+    row = rows[1]
     g1 = json.loads(row[0])
     g2 = json.loads(row[1])
     g3 = json.loads(row[2])
@@ -165,29 +166,10 @@ def test_grouped_xlsx_custom_labels(tmp_path, monkeypatch):
     assert g3 == {"原始记录": "记录A", "回答": "标准答A"}
 
 
-def test_grouped_csv_multiple_rows_pretty_json(tmp_path, monkeypatch):
+def test_grouped_csv_multiple_rows_pretty_json(grouped_cfg_path, tmp_path, monkeypatch):
     excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
 
-    cfg_text = (
-        """
-        [map]
-        {
-          "原始记录": "record",
-          "计分": "score",
-          "原始记录-问题": "ask",
-          "问题的积分": "ask_score",
-          "标准回答": "answer-1",
-          "猜测回答": "answer-2"
-        }
-
-        [out]
-        { "__label__": "input", "原始记录": "record", "计分": "score" }
-        { "__label__": "check", "原始记录-问题": "ask", "问题的积分": "ask_score" }
-        { "__label__": "answer", "原始记录": "record", "回答": { "name": "answer", "value": "answer-1", "ex": { "if": "score==2", "value": "answer-2" } } }
-        """
-    )
-    cfg_path = tmp_path / "cfg.conf"
-    _write_config(cfg_path, cfg_text)
+    cfg_path = grouped_cfg_path
 
     monkeypatch.chdir(tmp_path)
 
@@ -230,29 +212,12 @@ def test_grouped_csv_multiple_rows_pretty_json(tmp_path, monkeypatch):
     assert g3_r2 == {"原始记录": "记录B", "回答": "猜测答B"}
 
 
-def test_grouped_xlsx_multiple_rows_pretty_json(tmp_path, monkeypatch):
+def test_grouped_xlsx_multiple_rows_pretty_json(
+    grouped_cfg_path, tmp_path, monkeypatch
+):
     excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
 
-    cfg_text = (
-        """
-        [map]
-        {
-          "原始记录": "record",
-          "计分": "score",
-          "原始记录-问题": "ask",
-          "问题的积分": "ask_score",
-          "标准回答": "answer-1",
-          "猜测回答": "answer-2"
-        }
-
-        [out]
-        { "__label__": "input", "原始记录": "record", "计分": "score" }
-        { "__label__": "check", "原始记录-问题": "ask", "问题的积分": "ask_score" }
-        { "__label__": "answer", "原始记录": "record", "回答": { "name": "answer", "value": "answer-1", "ex": { "if": "score==2", "value": "answer-2" } } }
-        """
-    )
-    cfg_path = tmp_path / "cfg.conf"
-    _write_config(cfg_path, cfg_text)
+    cfg_path = grouped_cfg_path
 
     monkeypatch.chdir(tmp_path)
 
@@ -264,16 +229,12 @@ def test_grouped_xlsx_multiple_rows_pretty_json(tmp_path, monkeypatch):
     out_xlsx = tmp_path / "output" / "sample.xlsx"
     assert out_xlsx.exists()
 
-    import openpyxl
-
-    wb = openpyxl.load_workbook(out_xlsx)
-    ws = wb.active
-    headers = [c.value for c in ws[1]]
+    rows = _read_xlsx_rows(out_xlsx)
+    headers = list(rows[0])
     assert headers == ["input", "check", "answer"]
 
     # Two data rows
-    row1 = [c.value for c in ws[2]]
-    row2 = [c.value for c in ws[3]]
+    row1, row2 = rows[1], rows[2]
 
     # Pretty JSON should contain newlines
     assert "\n" in row1[0] and "\n" in row2[2]
@@ -437,10 +398,151 @@ def test_grouped_preserves_newlines_in_cell_xlsx(tmp_path, monkeypatch):
 
     out_xlsx = tmp_path / "output" / "nl.xlsx"
     assert out_xlsx.exists()
-    wb2 = openpyxl.load_workbook(out_xlsx)
-    ws2 = wb2.active
-    headers = [c.value for c in ws2[1]]
-    row = [c.value for c in ws2[2]]
+    rows = _read_xlsx_rows(out_xlsx)
+    headers, row = list(rows[0]), rows[1]
     assert headers == ["A"]
     obj = json.loads(row[0])
     assert obj["原始记录"].split("\n") == ["行一", "行二"]
+
+
+def test_streamed_grouped_rows_write_csv_with_fieldnames(tmp_path):
+    from src.excel_transformer.transform import (
+        iter_transform_rows_grouped,
+        write_csv,
+    )
+
+    excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
+
+    cfg_text = (
+        """
+        [map]
+        { "原始记录": "record", "计分": "score" }
+
+        [out]
+        { "__label__": "input", "原始记录": "record" }
+        { "__label__": "score", "计分": "score" }
+        """
+    )
+    cfg_path = tmp_path / "cfg.conf"
+    _write_config(cfg_path, cfg_text)
+    cfg = load_config(str(cfg_path))
+
+    rows = iter_transform_rows_grouped(
+        excel_path=str(excel_path),
+        display_to_internal=cfg.display_to_internal,
+        out_groups=cfg.out_groups,
+    )
+    assert not isinstance(rows, list)
+
+    out_csv = tmp_path / "streamed.csv"
+    write_csv(str(out_csv), rows, fieldnames=["score", "input"])
+
+    with out_csv.open("r", encoding="utf-8-sig", newline="") as f:
+        data = list(csv.reader(f))
+
+    assert data[0] == ["score", "input"]
+    assert [json.loads(cell) for cell in data[3]] == [
+        {"计分": 3},
+        {"原始记录": "记录C"},
+    ]
+    # Stream is fully consumed by the writer
+    assert next(rows, None) is None
+
+
+def test_compute_fieldnames_matches_transformed_rows(tmp_path):
+    from src.excel_transformer.transform import (
+        compute_fieldnames,
+        transform_rows_grouped,
+    )
+
+    excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
+
+    cfg_text = (
+        """
+        [map]
+        { "原始记录": "record", "计分": "score" }
+
+        [out]
+        { "__label__": "input", "原始记录": "record" }
+        { "计分": "score", "原始记录": "record" }
+        { "__label__": "input", "计分": "score" }
+        """
+    )
+    cfg_path = tmp_path / "cfg.conf"
+    _write_config(cfg_path, cfg_text)
+    cfg = load_config(str(cfg_path))
+    kwargs = dict(
+        excel_path=str(excel_path),
+        display_to_internal=cfg.display_to_internal,
+        out_groups=cfg.out_groups,
+    )
+
+    grouped = transform_rows_grouped(**kwargs)
+    assert compute_fieldnames(cfg.out_groups, grouped=True) == list(grouped[0])
+    assert compute_fieldnames(cfg.out_groups, grouped=True) == ["input", "group2"]
+
+    flat = transform_rows(**kwargs)
+    assert compute_fieldnames(cfg.out_groups, grouped=False) == [
+        "__label__",
+        "原始记录",
+        "计分",
+    ]
+    assert {k for r in flat for k in r} == {"__label__", "原始记录", "计分"}
+
+
+def test_repeated_condition_is_evaluated_once_per_row(tmp_path, monkeypatch):
+    from collections import OrderedDict
+
+    from src.excel_transformer import transform
+
+    calls = []
+    real_compile = transform._compile_condition
+    compiled = {}
+
+    def counting_compile(expr):
+        # Same expression -> same predicate object, like the real lru_cache
+        if expr not in compiled:
+            left, predicate = real_compile(expr)
+
+            def counted(value, predicate=predicate):
+                calls.append(value)
+                return predicate(value)
+
+            compiled[expr] = (left, counted)
+        return compiled[expr]
+
+    monkeypatch.setattr(transform, "_compile_condition", counting_compile)
+    monkeypatch.setattr(transform, "_compiled_cache", OrderedDict())
+
+    excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
+    cfg_text = (
+        """
+        [map]
+        {
+          "原始记录": "record",
+          "计分": "score",
+          "标准回答": "answer-1",
+          "猜测回答": "answer-2"
+        }
+
+        [out]
+        { "a": {
+            "value": "answer-1",
+            "ex": { "if": "score==2", "value": "answer-2" }
+        } }
+        { "b": { "value": "record", "ex": { "if": "score==2", "value": 7 } } }
+        """
+    )
+    cfg_path = tmp_path / "cfg.conf"
+    _write_config(cfg_path, cfg_text)
+    cfg = load_config(str(cfg_path))
+
+    rows = transform.transform_rows_grouped(
+        excel_path=str(excel_path),
+        display_to_internal=cfg.display_to_internal,
+        out_groups=cfg.out_groups,
+    )
+
+    assert [r["group2"]["b"] for r in rows] == ["记录A", 7, "记录C"]
+    assert rows[1]["group1"] == {"a": "猜测答B"}
+    assert calls == [1, 2, 3]
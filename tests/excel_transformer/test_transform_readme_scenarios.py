@@ -1,14 +1,9 @@
-import sys
 from pathlib import Path
 
+from src.excel_transformer.config import load_config
+from src.excel_transformer.transform import transform_rows
 
-# Ensure repo root is on sys.path so `import src.excel_transformer` works
 REPO_ROOT = Path(__file__).resolve().parents[2]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
-
-from src.excel_transformer.config import load_config  # noqa: E402
-from src.excel_transformer.transform import transform_rows  # noqa: E402
 
 
 def _write_config(path: Path, content: str) -> None:
@@ -151,3 +146,161 @@ def test_readme_scenario_3_nested(tmp_path: Path):
             "score": {"原始记录": 2},
         }
     ]
+
+
+def test_row_numbers_keep_requested_order_and_duplicates(tmp_path: Path):
+    excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
+
+    cfg_text = (
+        """
+        [map]
+        { "原始记录": "record" }
+
+        [out]
+        { "原始记录": "record" }
+        """
+    )
+    cfg_path = tmp_path / "config_order.conf"
+    _write_config(cfg_path, cfg_text)
+
+    cfg = load_config(str(cfg_path))
+    rows = transform_rows(
+        excel_path=str(excel_path),
+        display_to_internal=cfg.display_to_internal,
+        out_groups=cfg.out_groups,
+        header_row=1,
+        row_numbers=[3, 1, 3],
+    )
+
+    assert [r["原始记录"] for r in rows] == ["记录C", "记录A", "记录C"]
+
+
+def test_keys_and_literals_with_code_like_text_pass_through(tmp_path: Path):
+    excel_path = REPO_ROOT / "tests" / "data" / "sample.xlsx"
+
+    cfg_text = (
+        """
+        [map]
+        { "原始记录": "record", "计分": "score" }
+
+        [out]
+        {
+          "a\\"}): x": "record",
+          "lit": { "value": 3, "ex": { "if": "score==2", "value": "\\") or (1" } },
+          "n": { "'\\n": { "value": "__import__('os')" } }
+        }
+        """
+    )
+    cfg_path = tmp_path / "config_codegen.conf"
+    _write_config(cfg_path, cfg_text)
+
+    cfg = load_config(str(cfg_path))
+    rows = transform_rows(
+        excel_path=str(excel_path),
+        display_to_internal=cfg.display_to_internal,
+        out_groups=cfg.out_groups,
+        header_row=1,
+        row_numbers=[1, 2],
+    )
+
+    assert rows == [
+        {'a"}): x': "记录A", "lit": 3, "n": {"'\n": ""}},
+        {'a"}): x': "记录B", "lit": "", "n": {"'\n": ""}},
+    ]
+
+
+def test_install_openpyxl_warning_filter(monkeypatch):
+    import warnings
+
+    from src.excel_transformer import transform
+
+    monkeypatch.setattr(transform, "_default_style_filter_installed", False)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        transform.install_openpyxl_warning_filter()
+        assert transform._default_style_filter_installed
+
+        def fail(*args, **kwargs):
+            raise AssertionError("per-call suppression should be skipped")
+
+        monkeypatch.setattr(transform.warnings, "catch_warnings", fail)
+        with transform._suppress_openpyxl_default_style_warning():
+            warnings.warn_explicit(
+                transform._DEFAULT_STYLE_WARNING,
+                UserWarning,
+                "stylesheet.py",
+                1,
+                module="openpyxl.styles.stylesheet",
+            )
+        warnings.warn_explicit(
+            "other",
+            UserWarning,
+            "stylesheet.py",
+            1,
+            module="openpyxl.styles.stylesheet",
+        )
+
+    assert [str(w.message) for w in caught] == ["other"]
+
+
+def test_reads_only_the_used_column_span(tmp_path: Path):
+    from openpyxl import Workbook
+
+    from src.excel_transformer.transform import _column_span, _compile_group
+
+    excel_path = tmp_path / "wide.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["a", "b", "c", "d", "e", "f"])
+    ws.append([1, 2, 3, 4, 5, 6])
+    ws.append(["x", None, "y", 9, "z", None])
+    wb.save(excel_path)
+
+    cfg_text = (
+        """
+        [map]
+        { "a": "a", "c": "c", "d": "d", "e": "e" }
+
+        [out]
+        { "c": "c", "e": { "value": "e", "ex": { "if": "d==9", "value": "c" } } }
+        """
+    )
+    cfg_path = tmp_path / "config_span.conf"
+    _write_config(cfg_path, cfg_text)
+    cfg = load_config(str(cfg_path))
+
+    internal_to_col = {"a": 0, "c": 2, "d": 3, "e": 4}
+    plan = _compile_group(cfg.out_groups[0], internal_to_col, internal_to_col.keys())
+    assert _column_span([plan]) == (2, 4)
+
+    rows = transform_rows(
+        excel_path=str(excel_path),
+        display_to_internal=cfg.display_to_internal,
+        out_groups=cfg.out_groups,
+        row_numbers=[1, 2, 5, 0],
+    )
+    assert rows == [
+        {"c": 3, "e": 5},
+        {"c": "y", "e": "y"},
+        # Past the end of the sheet: empty cells, not missing columns
+        {"c": None, "e": None},
+        # Row 0 is the header row itself
+        {"c": "c", "e": "e"},
+    ]
+
+
+def test_compiled_transform_is_reused_until_config_changes():
+    from src.excel_transformer.transform import _compile_transform
+
+    headers = ["原始记录", "计分"]
+    mapper = {"原始记录": "record", "计分": "score"}
+    groups = [{"原始记录": "record"}]
+
+    first = _compile_transform(headers, mapper, groups)
+    assert _compile_transform(list(headers), dict(mapper), [dict(groups[0])]) is first
+
+    groups[0]["计分"] = "score"
+    changed = _compile_transform(headers, mapper, groups)
+    assert changed is not first
+    assert changed[0][0](("记录A", 1)) == {"原始记录": "记录A", "计分": 1}
+    assert _compile_transform(headers, mapper, groups, "__label__") is not changed
@@ -0,0 +1,404 @@
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from src.wf_batch_runner import cli
+
+
+def _write_input_csv(path: Path, n: int) -> None:
+    lines = ["input,check"]
+    lines += [f"q{i},{{}}" for i in range(n)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _fake_call_api(url, token, inputs_payload, user_val, *rest, **kwargs):
+    # Earlier rows answer later, so out-of-order completion would show up
+    idx = int(inputs_payload["input"][1:])
+    time.sleep(0.02 * (5 - idx))
+    return cli.RunResult(
+        task_id=inputs_payload["input"],
+        status="succeeded",
+        llm_out=f"out-{idx}",
+        outputs_raw={"llm_out": f"out-{idx}"},
+    )
+
+
+def test_concurrent_requests_keep_row_order(tmp_path: Path, monkeypatch):
+    in_path = tmp_path / "in.csv"
+    out_path = tmp_path / "out.csv"
+    _write_input_csv(in_path, 5)
+    monkeypatch.setattr(cli, "_call_api", _fake_call_api)
+
+    cli.main(
+        ["-i", str(in_path), "-o", str(out_path), "--token", "t", "--concurrency", "4"]
+    )
+
+    df = pd.read_csv(out_path)
+    assert list(df["task_id"]) == ["q0", "q1", "q2", "q3", "q4"]
+    assert list(df["data.outputs.llm_out"]) == [f"out-{i}" for i in range(5)]
+
+
+def test_markdown_wrapped_json_is_extracted():
+    text = 'Result:\n```json\n{"a": {"b": [1, 2]}}\n```\n'
+    obj, pretty = cli._try_parse_json_maybe_markdown(text)
+    assert obj == {"a": {"b": [1, 2]}}
+    assert pretty == '{\n  "a": {\n    "b": [\n      1,\n      2\n    ]\n  }\n}'
+
+    assert cli._try_parse_json_maybe_markdown("no json } here {") == (
+        None,
+        "no json } here {",
+    )
+
+
+def test_config_request_reads_columns_from_records(tmp_path: Path, monkeypatch):
+    in_path = tmp_path / "in.csv"
+    in_path.write_text(
+        ' Question ,check,user\nhi,"{""k"": 1}",u1\nyo,,\n', encoding="utf-8"
+    )
+    conf_path = tmp_path / "conf.json"
+    conf_path.write_text(
+        '{"request": {"inputs": {"q": "question",'
+        ' "check": {"from": "check", "as": "json_string"}}, "user": "user"}}',
+        encoding="utf-8",
+    )
+    seen = []
+
+    def fake(url, token, inputs_payload, user_val, *rest, session=None):
+        seen.append((inputs_payload, user_val))
+        return cli.RunResult(status="succeeded", outputs_raw={})
+
+    monkeypatch.setattr(cli, "_call_api", fake)
+    out_path = tmp_path / "out.csv"
+    args = ["-i", str(in_path), "-o", str(out_path), "--token", "t"]
+    cli.main(args + ["--config", str(conf_path)])
+
+    assert seen == [
+        ({"q": "hi", "check": '{"k":1}'}, "u1"),
+        ({"q": "yo", "check": ""}, "cli-runner"),
+    ]
+
+
+def test_xlsx_output_round_trips(tmp_path: Path):
+    out_path = tmp_path / "out.xlsx"
+    cli._write_xlsx_rows(out_path, ["a", "b"], [["x", 1], ["y", None]])
+
+    back = pd.read_excel(out_path)
+    assert list(back.columns) == ["a", "b"]
+    assert back["a"].tolist() == ["x", "y"]
+    assert back["b"].tolist()[0] == 1 and pd.isna(back["b"].tolist()[1])
+    # Trailing empty cells are not stored in the sheet XML, so that row reads short
+    assert cli._read_existing_output(out_path) == (["a", "b"], [["x", 1], ["y"]])
+
+
+def test_streaming_csv_widens_header_when_new_columns_appear(tmp_path: Path):
+    out_path = tmp_path / "out.csv"
+    writer = cli._StreamingTableWriter(out_path, flush_every=2)
+    writer.write_row({"a": "1", "b": 'x,"y"'})
+    writer.write_row({"a": "2", "c": "multi\nline"})
+    writer.write_row({"b": "3"})
+    assert out_path.read_text(encoding="utf-8").count("\n") == 5
+    writer.write_row({"a": "4"})
+    assert out_path.read_text(encoding="utf-8").count("\n") == 5
+    writer.close()
+
+    df = pd.read_csv(out_path, dtype=str, keep_default_na=False)
+    assert list(df.columns) == ["a", "b", "c"]
+    assert df.values.tolist() == [
+        ["1", 'x,"y"', ""],
+        ["2", "", "multi\nline"],
+        ["", "3", ""],
+        ["4", "", ""],
+    ]
+
+
+def test_flatten_dict_keeps_depth_first_key_order():
+    d = {"a": 1, "b": {"c": {"d": 2}, "e": {}, "f": [3]}, "g": None}
+    assert list(cli._flatten_dict(d).items()) == [
+        ("a", 1),
+        ("b.c.d", 2),
+        ("b.f", [3]),
+        ("g", None),
+    ]
+    deep = cur = {}
+    for _ in range(3000):
+        cur["k"] = cur = {}
+    cur["v"] = 1
+    assert list(cli._flatten_dict(deep).values()) == [1]
+
+
+def test_requests_share_one_session(monkeypatch):
+    sessions = []
+
+    def fake(*call_args, session=None):
+        sessions.append(session)
+        return cli.RunResult(status="succeeded")
+
+    monkeypatch.setattr(cli, "_call_api", fake)
+    calls = [("u", "t", {}, "cli-runner", 1.0, "blocking", True, False)] * 4
+    assert len(list(cli._iter_api_results(calls, 1))) == 4
+    assert len(list(cli._iter_api_results(calls, 3))) == 4
+
+    assert isinstance(sessions[0], cli.requests.Session)
+    assert len({id(s) for s in sessions[:4]}) == 1
+    assert len({id(s) for s in sessions[4:]}) == 1
+
+    list(cli._iter_api_results(calls, 32))
+    adapter = sessions[-1].get_adapter("https://x")
+    assert adapter._pool_maxsize == 32
+    assert (adapter.max_retries.connect, adapter.max_retries.read) == (3, 0)
+
+
+def test_streaming_xlsx_widens_header_when_new_columns_appear(tmp_path: Path):
+    out_path = tmp_path / "out.xlsx"
+    writer = cli._StreamingTableWriter(out_path, flush_every=2)
+    writer.write_row({"a": "1"})
+    assert not out_path.exists()
+    writer.write_row({"a": "2", "b": "x"})
+    assert out_path.exists()
+    writer.write_row({"a": "3"})
+    writer.close()
+    assert not out_path.with_name("out.xlsx.part").exists()
+
+    df = pd.read_excel(out_path, dtype=str, keep_default_na=False)
+    assert list(df.columns) == ["a", "b"]
+    assert df.values.tolist() == [["1", ""], ["2", "x"], ["3", ""]]
+
+
+def test_parse_json_pretty_caches_only_short_texts():
+    cli._parse_json_pretty_cached.cache_clear()
+    long_text = '{"k": "' + "x" * cli._JSON_CACHE_MAX_LEN + '"}'
+    assert cli._parse_json_pretty(long_text)[1] == {"k": "x" * cli._JSON_CACHE_MAX_LEN}
+    assert cli._parse_json_pretty_cached.cache_info().currsize == 0
+    assert cli._parse_json_pretty('{"a": 1}') == (True, {"a": 1}, '{\n  "a": 1\n}')
+    assert cli._parse_json_pretty_cached.cache_info().currsize == 1
+
+
+def test_compact_json_text_caches_only_short_texts():
+    cli._compact_json_text_cached.cache_clear()
+    long_text = '{"k": "' + "x" * cli._JSON_CACHE_MAX_LEN + '"}'
+    assert cli._compact_json_text(long_text) == long_text.replace(": ", ":")
+    assert cli._compact_json_text_cached.cache_info().currsize == 0
+    assert cli._compact_json_text('{"a": 1}') == '{"a":1}'
+    assert cli._compact_json_text_cached.cache_info().currsize == 1
+
+
+def test_render_value_unescapes_in_one_pass():
+    assert cli._render_value('a\\nb\\t\\"c\\"', True) == 'a\nb\t"c"'
+    # An escaped backslash followed by "n" is a literal backslash + "n"
+    assert cli._render_value("C:\\\\new", True) == "C:\\new"
+    assert cli._render_value("C:\\\\new", False) == "C:\\\\new"
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+class _FakeSession:
+    def __init__(self, data):
+        self.data = data
+        self.bodies = []
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        self.bodies.append(data)
+        return _FakeResponse(self.data)
+
+
+def test_call_api_renders_outputs():
+    outputs = {
+        "llm_out": "plain",
+        "llm_judge": '```json\n{"score": 3, "scores": {"a": 1}}\n```',
+        "check": {"k": [1]},
+    }
+    data = {"task_id": "t1", "data": {"status": "succeeded", "outputs": outputs}}
+    sess = _FakeSession(data)
+    args = ("u", "Bearer tok", {"input": "中"}, "me", 1.0, "blocking")
+
+    res = cli._call_api(*args, True, session=sess)
+    assert sess.bodies[0] == (
+        '{"inputs":{"input":"中"},"response_mode":"blocking","user":"me"}'
+    ).encode("utf-8")
+    assert (res.task_id, res.status, res.llm_out) == ("t1", "succeeded", "plain")
+    assert res.llm_judge_score == "3"
+    assert res.llm_judge_scores == '{\n  "a": 1\n}'
+    assert res.check_out == '{\n  "k": [\n    1\n  ]\n}'
+    assert res.session == "" and res.judge_usage == ""
+
+    res = cli._call_api(*args, False, session=sess)
+    assert res.llm_judge.startswith("```json") and res.llm_judge_score == ""
+    assert res.check_out == '{"k":[1]}'
+
+
+def test_call_api_nan_payload_fails_only_that_row():
+    sess = _FakeSession({})
+    args = ("u", "Bearer tok", {"x": float("nan")}, "me", 1.0, "blocking")
+    res = cli._call_api(*args, True, session=sess)
+    assert res.error.startswith("Invalid request payload:")
+    assert sess.bodies == []
+
+
+def test_unsupported_output_suffix_fails_before_any_request(tmp_path, monkeypatch):
+    in_path = tmp_path / "in.csv"
+    _write_input_csv(in_path, 2)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("no request expected")
+
+    monkeypatch.setattr(cli, "_call_api", fail)
+    with pytest.raises(ValueError, match="输出仅支持"):
+        cli.main(["-i", str(in_path), "-o", str(tmp_path / "out.xls"), "--token", "t"])
+    assert not (tmp_path / "out.xls").exists()
+
+
+def test_csv_input_keeps_cell_text_verbatim(tmp_path: Path, monkeypatch):
+    in_path = tmp_path / "in.csv"
+    in_path.write_text("input,check,user\n007,,\n1.50,[1],bob\n", encoding="utf-8")
+    seen = []
+
+    def fake(url, token, inputs_payload, user_val, *rest, session=None):
+        seen.append((inputs_payload, user_val))
+        return cli.RunResult(status="succeeded")
+
+    monkeypatch.setattr(cli, "_call_api", fake)
+    cli.main(["-i", str(in_path), "-o", str(tmp_path / "out.csv"), "--token", "t"])
+
+    assert seen == [
+        ({"input": "007", "check": ""}, "cli-runner"),
+        ({"input": "1.50", "check": "[1]"}, "bob"),
+    ]
+
+
+def test_csv_input_na_tokens_and_duplicate_headers(tmp_path: Path, monkeypatch):
+    in_path = tmp_path / "in.csv"
+    in_path.write_text(
+        "input,check,user,x,x,\n5,NA,N/A,null,NaN,#N/A\n\n", encoding="utf-8"
+    )
+    cols, rows = cli._read_input_rows(in_path)
+    assert cols == ["input", "check", "user", "x", "x.1", "Unnamed: 5"]
+    assert rows == [
+        {
+            "input": "5",
+            "check": None,
+            "user": None,
+            "x": None,
+            "x.1": None,
+            "Unnamed: 5": None,
+        }
+    ]
+    seen = []
+
+    def fake(url, token, inputs_payload, user_val, *rest, session=None):
+        seen.append((inputs_payload, user_val))
+        return cli.RunResult(status="succeeded")
+
+    monkeypatch.setattr(cli, "_call_api", fake)
+    cli.main(["-i", str(in_path), "-o", str(tmp_path / "out.csv"), "--token", "t"])
+
+    # CSV 数字按原文本发送；缺失标记与空单元格同样处理
+    assert seen == [({"input": "5", "check": ""}, "cli-runner")]
+
+
+def test_xlsx_input_rows_skip_pandas_coercion(tmp_path: Path, monkeypatch):
+    in_path = tmp_path / "in.xlsx"
+    wb = Workbook()
+    for r in (["input", "check", None, "x"], [1], [None, "[1]"], [], []):
+        wb.active.append(r)
+    wb.save(in_path)
+    seen = []
+
+    def fake(url, token, inputs_payload, user_val, *rest, session=None):
+        seen.append(inputs_payload)
+        return cli.RunResult(status="succeeded")
+
+    monkeypatch.setattr(cli, "_call_api", fake)
+    cli.main(["-i", str(in_path), "-o", str(tmp_path / "out.csv"), "--token", "t"])
+
+    cols, rows = cli._read_input_rows(in_path)
+    assert cols == ["input", "check", "Unnamed: 2", "x"]
+    assert len(rows) == 2
+    assert seen == [{"input": "1", "check": ""}, {"input": "", "check": "[1]"}]
+
+
+def test_xlsx_input_duplicate_headers_and_extra_cells_match_pandas(tmp_path: Path):
+    in_path = tmp_path / "in.xlsx"
+    wb = Workbook()
+    for r in (["x", "x", "x.1"], [1, 2, 3, 4], ["a"]):
+        wb.active.append(r)
+    wb.save(in_path)
+
+    cols, rows = cli._read_input_rows(in_path)
+    df = pd.read_excel(in_path)
+    assert cols == list(df.columns) == ["x", "x.2", "x.1", "Unnamed: 3"]
+    assert rows == [
+        {"x": 1, "x.2": 2, "x.1": 3, "Unnamed: 3": 4},
+        {"x": "a", "x.2": None, "x.1": None, "Unnamed: 3": None},
+    ]
+
+
+def test_config_columns_and_include_all(tmp_path: Path, monkeypatch):
+    in_path = tmp_path / "in.csv"
+    _write_input_csv(in_path, 1)
+    conf_path = tmp_path / "conf.json"
+    conf_path.write_text(
+        '{"include_all": true, "columns": ['
+        '{"name": "V", "path": "out_1"}, {"name": "err", "path": "$.error"},'
+        '{"name": "deep", "path": "meta.a.b"}]}',
+        encoding="utf-8",
+    )
+    outputs = {"out_1": "x", "meta": {"a": {"b": 2}, "c": "y"}}
+
+    def fake(*call_args, session=None):
+        return cli.RunResult(status="succeeded", error="boom", outputs_raw=outputs)
+
+    monkeypatch.setattr(cli, "_call_api", fake)
+    out_path = tmp_path / "out.csv"
+    args = ["-i", str(in_path), "-o", str(out_path), "--token", "t"]
+    cli.main(args + ["--config", str(conf_path)])
+
+    df = pd.read_csv(out_path, dtype=str, keep_default_na=False)
+    # out_1 and meta.a.b are already mapped by columns, so include_all skips them
+    assert list(df.columns)[5:] == ["V", "err", "deep", "meta.c"]
+    assert df.iloc[0].tolist()[5:] == ["x", "boom", "2", "y"]
+
+
+def _run_fast_append(tmp_path, monkeypatch, out_name, n_rows, *extra):
+    in_path = tmp_path / "in.csv"
+    _write_input_csv(in_path, 5)
+    calls = []
+
+    def fake(url, token, inputs_payload, *rest, session=None):
+        calls.append(inputs_payload["input"])
+        return cli.RunResult(task_id=inputs_payload["input"], status="succeeded")
+
+    monkeypatch.setattr(cli, "_call_api", fake)
+    out_path = tmp_path / out_name
+    args = ["-i", str(in_path), "-o", str(out_path), "--token", "t"]
+    cli.main(args + ["--fast-append", "1", "--max-rows", str(n_rows), *extra])
+    return out_path, calls
+
+
+@pytest.mark.parametrize("out_name", ["out.csv", "out.xlsx"])
+def test_fast_append_resumes_after_existing_rows(tmp_path, monkeypatch, out_name):
+    out_path, calls = _run_fast_append(
+        tmp_path, monkeypatch, out_name, 2, "--flush-every", "1"
+    )
+    assert calls == ["q0", "q1"]
+    out_path, calls = _run_fast_append(
+        tmp_path, monkeypatch, out_name, 5, "--flush-every", "2"
+    )
+    assert calls == ["q2", "q3", "q4"]
+
+    read = pd.read_csv if out_name.endswith(".csv") else pd.read_excel
+    df = read(out_path)
+    assert list(df.columns) == cli._FIXED_COLUMNS
+    assert df["task_id"].tolist() == ["q0", "q1", "q2", "q3", "q4"]
+    assert not out_path.with_name(out_path.name + ".part").exists()